@@ -1,8 +1,14 @@
 from fastapi import APIRouter
-from app.routers import items, orders, categories, s3
+from app.db.session import ASYNC_DATABASE
+from app.routers import items, orders, categories, s3, cache
+
+# An async DATABASE_URL (e.g. sqlite+aiosqlite://) serves the DB routers on the event loop
+if ASYNC_DATABASE:
+    from app.routers import async_items as items, async_orders as orders, async_categories as categories
 
 api_router = APIRouter()
 api_router.include_router(items.router, prefix="/items", tags=["items"])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
-api_router.include_router(s3.router, prefix="/s3", tags=["s3"])
\ No newline at end of file
+api_router.include_router(s3.router, prefix="/s3", tags=["s3"])
+api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
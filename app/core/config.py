@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,10 +7,117 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str = "Maintenance Service API"
     PROJECT_VERSION: str = "0.1.0"
+    # production skips schema creation and the browser launch at startup
+    APP_ENV: Literal["development", "production"] = "development"
+    # Override the APP_ENV defaults (None: only in development)
+    CREATE_SCHEMA_ON_STARTUP: bool | None = None
+    OPEN_BROWSER_ON_STARTUP: bool | None = None
     DATABASE_URL: str = "sqlite:///./maintenance.db"
     AWS_S3_BUCKET: str = "mi-bucket-simulado"
     AWS_REGION: str = "us-east-1"
     AWS_ACCESS_KEY_ID: str | None = None
     AWS_SECRET_ACCESS_KEY: str | None = None
+    # Where image objects live: "s3" (AWS_S3_BUCKET) or "local"
+    # (LOCAL_STORAGE_DIR, for offline development; no presigned URLs)
+    STORAGE_BACKEND: Literal["s3", "local"] = "s3"
+    LOCAL_STORAGE_DIR: str = "storage"
+    # S3-compatible endpoint (MinIO, LocalStack, moto server); None = AWS
+    S3_ENDPOINT_URL: str | None = None
+    # Image uploads streamed through the API: multipart part size (S3 minimum
+    # is 5 MiB, every part is held in memory once) and largest accepted body
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+    S3_DOWNLOAD_CHUNK_SIZE: int = 256 * 1024
+    S3_PRESIGNED_EXPIRES_SECONDS: int = 900
+    # Batch image operations: S3 calls in flight (thread pool size, also the
+    # botocore connection pool) and files accepted per batch upload
+    S3_MAX_CONCURRENCY: int = 16
+    S3_BATCH_MAX_FILES: int = 200
+    # Image listing pages kept per worker; our own writes invalidate them,
+    # writes from elsewhere show up after at most this long
+    S3_LISTING_CACHE_TTL_SECONDS: float = 10.0
+    S3_LISTING_PAGE_SIZE: int = 100
+    # Derivatives rendered on upload (longest edge in px) in a process pool
+    # of THUMBNAIL_WORKERS per server worker (None: cores // SERVER_WORKERS);
+    # larger sources are skipped
+    THUMBNAILS_ENABLED: bool = True
+    THUMBNAIL_SIZES: list[int] = [160, 640]
+    THUMBNAIL_QUALITY: int = 82
+    THUMBNAIL_WORKERS: int | None = None
+    THUMBNAIL_MAX_SOURCE_BYTES: int = 25 * 1024 * 1024
+    THUMBNAIL_CACHE_SECONDS: int = 7 * 24 * 3600
+
+    # Connection pool (not used by in-memory SQLite, which has one connection)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    DB_POOL_PRE_PING: bool = True
+
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"] = "WAL"  # file databases only
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes, file databases only
+
+    # PostgreSQL session settings applied at connect time
+    POSTGRES_STATEMENT_TIMEOUT_MS: int | None = None
+
+    # In-process read-through cache for item/category lists (per worker)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: float = 30.0
+    CACHE_MAX_ENTRIES: int = 256
+    CACHE_MAX_ROWS: int = 1000  # larger results are not cached
+
+    # Idempotency keys: retention, in-memory front cache, background purge
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 300.0  # 0 disables the purge job
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = 500
+
+    # Request metrics recorded by measure_time and served at /metrics;
+    # fraction of calls that also write a timing log line
+    METRICS_ENABLED: bool = True
+    METRICS_LOG_SAMPLE_RATE: float = 0.01
+
+    # Per-request query count / DB time headers (X-DB-Queries, Server-Timing)
+    # and the threshold over which a statement is logged (None disables)
+    QUERY_STATS_ENABLED: bool = True
+    SLOW_QUERY_MS: float | None = 200.0
+
+    # Production server (python -m app.serve); None workers = one per CPU
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int | None = None
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_ACCESS_LOG: bool = False
+
+    # Routers whose list endpoints skip response_model validation and encode
+    # the service rows directly, opt-in (JSON list in the environment, e.g.
+    # '["items", "orders", "categories"]')
+    FAST_JSON_ROUTERS: list[str] = []
+
+    # Page size of list endpoints without ?limit=, and the largest accepted
+    DEFAULT_PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+    # Rows fetched per round trip by the NDJSON export endpoints
+    EXPORT_BATCH_SIZE: int = 1000
+    # Bulk item upsert: rows per INSERT ... ON CONFLICT statement / per request
+    BULK_BATCH_SIZE: int = 500
+    BULK_MAX_ROWS: int = 50000
+
+    @property
+    def create_schema_on_startup(self) -> bool:
+        if self.CREATE_SCHEMA_ON_STARTUP is not None:
+            return self.CREATE_SCHEMA_ON_STARTUP
+        return self.APP_ENV == "development"
+
+    @property
+    def open_browser_on_startup(self) -> bool:
+        if self.OPEN_BROWSER_ON_STARTUP is not None:
+            return self.OPEN_BROWSER_ON_STARTUP
+        return self.APP_ENV == "development"
 
 settings = Settings()
\ No newline at end of file
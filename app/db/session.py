@@ -1,17 +1,129 @@
 # app/db/session.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.utils.query_stats import install_query_stats
 
-# connect_args for sqlite in multithread dev env
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+# Blocking driver used for the sync engine when DATABASE_URL names an async one
+SYNC_DRIVERS = {
+    "aiosqlite": "pysqlite",
+    "asyncpg": "psycopg2",
+    "psycopg_async": "psycopg",
+    "aiomysql": "pymysql",
+    "asyncmy": "pymysql",
+}
+
+
+def is_async_url(url: str | URL) -> bool:
+    """
+    True when the URL names an asyncio driver (e.g. sqlite+aiosqlite,
+    postgresql+asyncpg), which switches the API to the async services.
+    """
+    return bool(getattr(make_url(url).get_dialect(), "is_async", False))
+
+
+def sync_database_url(url: str | URL) -> URL:
+    """
+    Same database as url, reached through a blocking driver.
+    """
+    url = make_url(url)
+    driver = SYNC_DRIVERS.get(url.get_driver_name())
+    if driver is None:
+        return url
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def _connect_args(url: URL) -> dict:
+    # connect_args for sqlite in multithread dev env
+    if url.get_backend_name() == "sqlite":
+        return {"check_same_thread": False}
+    if url.get_backend_name() == "postgresql" and settings.POSTGRES_STATEMENT_TIMEOUT_MS is not None:
+        timeout = str(settings.POSTGRES_STATEMENT_TIMEOUT_MS)
+        if url.get_driver_name() == "asyncpg":
+            return {"server_settings": {"statement_timeout": timeout}}
+        return {"options": f"-c statement_timeout={timeout}"}
+    return {}
+
+
+def engine_options(url: URL) -> dict:
+    """
+    Keyword arguments for create_engine/create_async_engine built from Settings.
+    """
+    options = {"connect_args": _connect_args(url), "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not is_memory_sqlite(url):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def install_sqlite_pragmas(sync_engine, url: URL) -> None:
+    """
+    Apply the SQLITE_* pragmas to every new DBAPI connection of sync_engine
+    (for an AsyncEngine pass async_engine.sync_engine).
+
+    WAL lets readers proceed while a writer commits; synchronous=NORMAL is
+    durable in WAL mode while skipping an fsync per commit; busy_timeout
+    makes writers wait for the lock instead of failing with "database is
+    locked".
+    """
+    if url.get_backend_name() != "sqlite":
+        return
+    pragmas = [
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}",
+    ]
+    if not is_memory_sqlite(url):
+        pragmas.insert(0, f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        pragmas.append(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+ASYNC_DATABASE = is_async_url(settings.DATABASE_URL)
+
+_sync_url = sync_database_url(settings.DATABASE_URL)
+engine = create_engine(_sync_url, **engine_options(_sync_url))
+install_sqlite_pragmas(engine, _sync_url)
+install_query_stats(engine, settings.SLOW_QUERY_MS)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+# Async engine, only when DATABASE_URL uses an asyncio driver. The sync engine
+# above still exists in that mode (schema creation, scripts).
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = make_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+    install_sqlite_pragmas(async_engine.sync_engine, _async_url)
+    install_query_stats(async_engine.sync_engine, settings.SLOW_QUERY_MS)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Dependency for FastAPI (if you use Depends(get_db) in endpoints)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,24 +1,51 @@
+import asyncio
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from app.api.v1.api import api_router
+from app.routers import metrics
 from app.core.config import settings
-from app.db.session import Base, engine
-from app.models import Item, Category, Order, IdempotencyKey
+from app.db.session import Base, async_engine, engine
+from app.models import Item, Category, Order, IdempotencyKey, TableVersion
+from app.services.idempotency_service import IdempotencyService
+from app.services.s3_service import s3_service
+from app.services.thumbnail_service import thumbnail_service
+from app.utils.query_stats import QueryStatsMiddleware
 
 import webbrowser
 import threading
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    # Open docs in the browser after 1 second
-    threading.Timer(1.0, lambda: webbrowser.open("http://127.0.0.1:8000/docs")).start()
+    # Production runs migrations/schema setup out of band and has no browser
+    if settings.create_schema_on_startup:
+        Base.metadata.create_all(bind=engine)
+    if settings.open_browser_on_startup:
+        # Open docs in the browser after 1 second
+        threading.Timer(1.0, lambda: webbrowser.open("http://127.0.0.1:8000/docs")).start()
+    purge_task = None
+    if settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS > 0:
+        purge_task = asyncio.create_task(IdempotencyService.purge_periodically(
+            settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS, settings.IDEMPOTENCY_PURGE_BATCH_SIZE
+        ))
     yield
+    if purge_task is not None:
+        purge_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await purge_task
+    if async_engine is not None:
+        await async_engine.dispose()
+    # Pool processes and threads would otherwise outlive the app
+    await asyncio.to_thread(thumbnail_service.shutdown)
+    await asyncio.to_thread(s3_service.shutdown)
 
 
 def create_app():
     app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION, lifespan=lifespan)
     app.include_router(api_router, prefix="/router")
+    # Scrape target at the conventional path, outside /router
+    app.include_router(metrics.router, tags=["metrics"])
+    if settings.QUERY_STATS_ENABLED:
+        app.add_middleware(QueryStatsMiddleware)
     return app
 
 app = create_app()
\ No newline at end of file
@@ -2,11 +2,13 @@ from .item import Item
 from .category import Category
 from .order import Order, order_items
 from .idempotency import IdempotencyKey
+from .table_version import TableVersion
 
 __all__ = [
     "Item",
     "Category",
     "Order",
     "IdempotencyKey",
+    "TableVersion",
     "order_items",
 ]
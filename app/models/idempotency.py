@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String , DateTime, func
+from sqlalchemy import Column, Index, Integer, String , DateTime, Text, func
 from app.db.session import Base
 
 
 class IdempotencyKey(Base):
     __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Replay lookups filter on both columns; created_at drives the purge
+        Index("ix_idempotency_keys_type_key", "resource_type", "request_key"),
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     request_key = Column(String, unique=True, nullable=False, index=True)
     resource_type = Column(String, nullable=False)
     resource_id = Column(Integer, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Response body produced when the key was first used, replayed verbatim
+    # (the status is always 200 on replay). NULL for rows written before
+    # this column existed.
+    response_body = Column(Text, nullable=True)
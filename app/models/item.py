@@ -8,7 +8,8 @@ class Item(Base):
     __tablename__ = "items"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    sku = Column(String, nullable=False, unique=False, index=False)
+    # Code point order on PostgreSQL too, so sku_prefix ranges mean "starts with"
+    sku = Column(String().with_variant(String(collation="C"), "postgresql"), nullable=False)
     price = Column(Float, nullable=False, default=0.0)
     stock = Column(Integer, nullable=False, default=0)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
@@ -18,5 +19,11 @@ class Item(Base):
     category = relationship("Category", back_populates="items", lazy="selectin")
 
     __table_args__ = (
-        Index("ix_items_sku", "sku"),  # Default B-Tree index in most DBs
+        # SKU is the natural key used by bulk upserts (ON CONFLICT (sku))
+        Index("ix_items_sku", "sku", unique=True),
+        # Keyset pages of the ?category_id= / ?sort= / ?stock_below= /
+        # ?min_price=&max_price= item lists: (filter or sort column, id)
+        Index("ix_items_category_id_id", "category_id", "id"),
+        Index("ix_items_price_id", "price", "id"),
+        Index("ix_items_stock_id", "stock", "id"),
     )
\ No newline at end of file
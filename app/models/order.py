@@ -20,4 +20,7 @@ class Order(Base):
 
 
     # Relationship with Item table through order_items association table
-    items = relationship("Item", secondary=order_items)
\ No newline at end of file
+    items = relationship("Item", secondary=order_items)
+
+    # Load created_at with INSERT ... RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
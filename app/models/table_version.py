@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.db.session import Base
+
+
+# Change counter per table, bumped right after every write commits.
+# List endpoints derive their ETag from it without reading the rows.
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List
+from app.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
+from app.services.async_category_service import AsyncCategoryService
+from app.services.async_version_service import AsyncVersionService
+from app.utils.decorators import measure_time
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams
+from app.utils.responses import json_renderer
+
+# Same endpoints as app.routers.categories, served on the event loop (async database mode)
+router = APIRouter()
+render = json_renderer("categories")
+
+@router.post("/", response_model=CategoryRead, status_code=status.HTTP_201_CREATED)
+@measure_time
+async def create_category(payload: CategoryCreate):
+    category = await AsyncCategoryService.create_category(payload.model_dump())
+    return category
+
+@router.get("/", response_model=List[CategoryRead])
+@measure_time
+async def list_categories(request: Request, response: Response, page: PageParams = Depends()):
+    versions = await AsyncVersionService.get_versions("categories")
+    not_modified = conditional_get(request, response, versions)
+    if not_modified is not None:
+        return not_modified
+    categories = await AsyncCategoryService.list_categories(limit=page.fetch_limit, after_id=page.after_id, versions=versions)
+    return render(page.paginate(categories, response), response)
+
+@router.patch("/{category_id}", response_model=CategoryRead)
+@measure_time
+async def patch_category(category_id: int, payload: CategoryUpdate):
+    data = payload.model_dump(exclude_unset=True)
+    category = await AsyncCategoryService.patch_category(category_id, data)
+    if category is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    return category
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List
+from app.core.config import settings
+from app.routers.items import BULK_OPENAPI_EXTRA, ItemFilterParams, bulk_response, read_bulk_rows, validate_bulk_rows
+from app.schemas.item import ItemBulkResponse, ItemCreate, ItemRead, ItemUpdate
+from app.services.async_item_service import AsyncItemService
+from app.services.async_version_service import AsyncVersionService
+from app.utils.decorators import measure_time
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams
+from app.utils.responses import json_renderer
+from app.utils.streaming import NDJSON_MEDIA_TYPE, ndjson_stream_async
+
+# Same endpoints as app.routers.items, served on the event loop (async database mode)
+router = APIRouter()
+render = json_renderer("items")
+
+@router.post("/", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
+@measure_time
+async def create_item(payload: ItemCreate):
+    try:
+        item = await AsyncItemService.create_item(payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return item
+
+@router.post("/bulk", response_model=ItemBulkResponse, openapi_extra=BULK_OPENAPI_EXTRA)
+@measure_time
+async def bulk_upsert_items(request: Request):
+    """
+    Create or update many items keyed by SKU (JSON array or NDJSON body).
+    """
+    raw_rows = await read_bulk_rows(request)
+    results, valid_indexes, valid_rows = validate_bulk_rows(raw_rows)
+    upserted = await AsyncItemService.bulk_upsert_items(valid_rows, settings.BULK_BATCH_SIZE)
+    return bulk_response(results, valid_indexes, upserted)
+
+@router.get("/", response_model=List[ItemRead])
+@measure_time
+async def list_items(request: Request, response: Response, page: PageParams = Depends(), query: ItemFilterParams = Depends()):
+    after_value = query.cursor_value(page)
+    versions = await AsyncVersionService.get_versions("items", "categories")
+    not_modified = conditional_get(request, response, versions)
+    if not_modified is not None:
+        return not_modified
+    items = await AsyncItemService.list_items(
+        limit=page.fetch_limit, after_id=page.after_id, filters=query.filters, after_value=after_value, versions=versions
+    )
+    return render(page.paginate(items, response, query.filters.sort), response)
+
+@router.patch("/{item_id}", response_model=ItemRead)
+@measure_time
+async def patch_item(item_id: int, payload: ItemUpdate):
+    data = payload.model_dump(exclude_unset=True)
+    item = await AsyncItemService.patch_item(item_id, data)
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    return item
+
+@router.get("/export", response_class=StreamingResponse)
+@measure_time
+async def export_items():
+    """
+    Stream all items as NDJSON (one JSON object per line).
+    """
+    rows = AsyncItemService.iter_items(batch_size=settings.EXPORT_BATCH_SIZE)
+    return StreamingResponse(ndjson_stream_async(rows), media_type=NDJSON_MEDIA_TYPE)
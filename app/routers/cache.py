@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from app.utils.cache import CACHES
+from app.utils.decorators import measure_time
+
+router = APIRouter()
+
+@router.get("/stats")
+@measure_time
+def get_cache_stats():
+    """
+    Hit/miss counters and size of every in-process cache (this worker only).
+    """
+    return {name: cache.stats() for name, cache in CACHES.items()}
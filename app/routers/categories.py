@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from app.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
 from app.services.category_service import CategoryService
+from app.services.version_service import VersionService
 from app.utils.decorators import measure_time
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams
+from app.utils.responses import json_renderer
 
 router = APIRouter()
+render = json_renderer("categories")
 
 @router.post("/", response_model=CategoryRead, status_code=status.HTTP_201_CREATED)
 @measure_time
@@ -14,9 +19,13 @@ def create_category(payload: CategoryCreate):
 
 @router.get("/", response_model=List[CategoryRead])
 @measure_time
-def list_categories():
-    categories = CategoryService.list_categories()
-    return categories
+def list_categories(request: Request, response: Response, page: PageParams = Depends()):
+    versions = VersionService.get_versions("categories")
+    not_modified = conditional_get(request, response, versions)
+    if not_modified is not None:
+        return not_modified
+    categories = CategoryService.list_categories(limit=page.fetch_limit, after_id=page.after_id, versions=versions)
+    return render(page.paginate(categories, response), response)
 
 @router.patch("/{category_id}", response_model=CategoryRead)
 @measure_time
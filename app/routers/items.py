@@ -1,22 +1,154 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from app.schemas.item import ItemCreate, ItemRead, ItemUpdate
-from app.services.item_service import ItemService
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, List, Literal, Optional, Tuple
+from app.core.config import settings
+from app.schemas.item import ItemBulkResponse, ItemCreate, ItemRead, ItemUpdate
+from app.services.item_service import ITEM_SORTS, ItemFilter, ItemService
+from app.services.version_service import VersionService
 from app.utils.decorators import measure_time
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams
+from app.utils.responses import json_renderer
+from app.utils.streaming import NDJSON_MEDIA_TYPE, ndjson_stream, parse_ndjson
 
 router = APIRouter()
+render = json_renderer("items")
 
 @router.post("/", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
 @measure_time
 def create_item(payload: ItemCreate):
-    item = ItemService.create_item(payload.model_dump())
+    try:
+        item = ItemService.create_item(payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     return item
 
+# Request body documentation for the bulk endpoint (the body is parsed by hand)
+BULK_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/ItemCreate"}}},
+            NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/ItemCreate"}},
+        },
+    }
+}
+
+async def read_bulk_rows(request: Request) -> list:
+    """
+    Decode a bulk body (JSON array or NDJSON) into raw rows.
+    """
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+            raw_rows = parse_ndjson(body)
+        else:
+            raw_rows = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not isinstance(raw_rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of items")
+    if len(raw_rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_MAX_ROWS} items per request",
+        )
+    return raw_rows
+
+def validate_bulk_rows(raw_rows: list) -> Tuple[list, List[int], List[dict]]:
+    """
+    Validate every row in one pass.
+
+    Returns (results with the invalid rows filled in, indexes of valid rows, valid rows).
+    """
+    results = [None] * len(raw_rows)
+    valid_indexes, valid_rows = [], []
+    for index, raw in enumerate(raw_rows):
+        try:
+            valid_rows.append(ItemCreate.model_validate(raw).model_dump())
+            valid_indexes.append(index)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "sku": raw.get("sku") if isinstance(raw, dict) and isinstance(raw.get("sku"), str) else None,
+                "status": "error",
+                "errors": [f"{'.'.join(str(p) for p in err['loc']) or 'item'}: {err['msg']}" for err in e.errors()],
+            }
+    return results, valid_indexes, valid_rows
+
+def bulk_response(results: list, valid_indexes: List[int], upserted: List[dict]) -> dict:
+    for index, result in zip(valid_indexes, upserted):
+        results[index] = {"index": index, **result}
+    return {
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "updated": sum(1 for r in results if r["status"] == "updated"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+    }
+
+@router.post("/bulk", response_model=ItemBulkResponse, openapi_extra=BULK_OPENAPI_EXTRA)
+@measure_time
+async def bulk_upsert_items(request: Request):
+    """
+    Create or update many items keyed by SKU.
+
+    Accepts a JSON array or an NDJSON body (Content-Type: application/x-ndjson).
+    Every row is validated, valid rows are upserted in batches and the
+    response holds one result per input row, in order.
+    """
+    raw_rows = await read_bulk_rows(request)
+    results, valid_indexes, valid_rows = validate_bulk_rows(raw_rows)
+    # Blocking DB work goes to the threadpool like the sync endpoints
+    upserted = await run_in_threadpool(ItemService.bulk_upsert_items, valid_rows, settings.BULK_BATCH_SIZE)
+    return bulk_response(results, valid_indexes, upserted)
+
+class ItemFilterParams:
+    """
+    Filter and sort query parameters of the item list, evaluated in SQL.
+    """
+
+    def __init__(
+        self,
+        category_id: Optional[int] = Query(default=None, description="Only items of this category"),
+        sku_prefix: Optional[str] = Query(default=None, min_length=1, max_length=64, description="Only SKUs starting with this text"),
+        min_price: Optional[float] = Query(default=None, description="Lowest price, inclusive"),
+        max_price: Optional[float] = Query(default=None, description="Highest price, inclusive"),
+        stock_below: Optional[int] = Query(default=None, description="Only items with stock lower than this"),
+        sort: Literal[ITEM_SORTS] = Query(default="id", description="Sort column, prefixed with - for descending"),
+    ):
+        self.filters = ItemFilter(category_id, sku_prefix, min_price, max_price, stock_below, sort)
+
+    def cursor_value(self, page: PageParams) -> Any:
+        """
+        Sort value carried by page's cursor; 400 if the cursor was issued for
+        a list with a different sort (column or direction).
+        """
+        if page.after_id is None:
+            return None
+        sorted_by_id = self.filters.sort_field == "id"
+        if page.after_sort != self.filters.sort or sorted_by_id != (page.after_value is None):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match the sort order")
+        return page.after_value
+
 @router.get("/", response_model=List[ItemRead])
 @measure_time
-def list_items():
-    items = ItemService.list_items()
-    return items
+def list_items(request: Request, response: Response, page: PageParams = Depends(), query: ItemFilterParams = Depends()):
+    """
+    List items, optionally filtered (category_id, sku_prefix, min_price,
+    max_price, stock_below), sorted (?sort=price, -stock, ...) and paginated.
+    """
+    after_value = query.cursor_value(page)
+    versions = VersionService.get_versions("items", "categories")
+    not_modified = conditional_get(request, response, versions)
+    if not_modified is not None:
+        return not_modified
+    items = ItemService.list_items(
+        limit=page.fetch_limit, after_id=page.after_id, filters=query.filters, after_value=after_value, versions=versions
+    )
+    return render(page.paginate(items, response, query.filters.sort), response)
 
 @router.patch("/{item_id}", response_model=ItemRead)
 @measure_time
@@ -26,3 +158,12 @@ def patch_item(item_id: int, payload: ItemUpdate):
     if item is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
     return item
+
+@router.get("/export", response_class=StreamingResponse)
+@measure_time
+def export_items():
+    """
+    Stream all items as NDJSON (one JSON object per line).
+    """
+    rows = ItemService.iter_items(batch_size=settings.EXPORT_BATCH_SIZE)
+    return StreamingResponse(ndjson_stream(rows), media_type=NDJSON_MEDIA_TYPE)
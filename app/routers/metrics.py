@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Response
+from app.utils.cache import CACHES
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, registry, render_gauges
+
+router = APIRouter()
+
+# Cache counters exported next to the request metrics
+CACHE_GAUGES = (
+    ("cache_hits", "hits", "Cache hits."),
+    ("cache_misses", "misses", "Cache misses."),
+    ("cache_evictions", "evictions", "Entries evicted by the LRU bound."),
+    ("cache_entries", "entries", "Entries currently stored."),
+    ("cache_hit_ratio", "hit_ratio", "Hits over lookups."),
+)
+
+@router.get("/metrics", response_class=Response)
+def get_metrics():
+    """
+    Request counts, errors and latency histograms (p50/p95/p99) per endpoint,
+    plus cache counters, in Prometheus text format (this worker only).
+    """
+    cache_stats = {name: cache.stats() for name, cache in CACHES.items()}
+    body = registry.render_prometheus() + "".join(
+        render_gauges(name, help_text, "cache", ((cache, stats[key]) for cache, stats in cache_stats.items()))
+        for name, key, help_text in CACHE_GAUGES
+    )
+    return Response(content=body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from typing import List
+from app.core.config import settings
 from app.schemas.order import OrderCreate, OrderRead
-from app.services.order_service import OrderService
+from app.services.order_service import InsufficientStockError, OrderService
+from app.services.version_service import VersionService
 from app.utils.decorators import measure_time
+from app.utils.etag import conditional_get
+from app.utils.pagination import PageParams
+from app.utils.responses import json_renderer
+from app.utils.streaming import NDJSON_MEDIA_TYPE, ndjson_stream
 
 router = APIRouter()
+render = json_renderer("orders")
 
 @router.post("/", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
 @measure_time
@@ -12,19 +20,38 @@ def create_order(payload: OrderCreate, idempotency_key: str | None = Header(defa
     # Priority: Idempotency-Key header if present, otherwise payload.request_id
     request_key = idempotency_key or payload.request_id
     try:
-        order, created = OrderService.create_order(payload.report, [it.model_dump() for it in payload.items], request_key=request_key)
+        body, created = OrderService.create_order(payload.report, [it.model_dump() for it in payload.items], request_key=request_key)
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # If it was idempotent, return 200 OK
-    # If created, return 201 (via decorator status_code)
-    return order
+    # Stored JSON is sent as-is, so a replay is byte-for-byte the original
+    # If it was idempotent, return 200 OK; if created, 201
+    return Response(
+        content=body,
+        media_type="application/json",
+        status_code=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+    )
 
 @router.get("/", response_model=List[OrderRead])
 @measure_time
-def list_orders():
+def list_orders(request: Request, response: Response, page: PageParams = Depends()):
     """
-    Retrieve all service orders.
+    Retrieve service orders, optionally paginated with ?limit=&after=.
     """
-    orders = OrderService.list_orders()
-    return orders
+    versions = VersionService.get_versions("orders")
+    not_modified = conditional_get(request, response, versions)
+    if not_modified is not None:
+        return not_modified
+    orders = OrderService.list_orders(limit=page.fetch_limit, after_id=page.after_id)
+    return render(page.paginate(orders, response), response)
+
+@router.get("/export", response_class=StreamingResponse)
+@measure_time
+def export_orders():
+    """
+    Stream all orders as NDJSON (one JSON object per line).
+    """
+    rows = OrderService.iter_orders(batch_size=settings.EXPORT_BATCH_SIZE)
+    return StreamingResponse(ndjson_stream(rows), media_type=NDJSON_MEDIA_TYPE)
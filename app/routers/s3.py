@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.core.config import settings
 from app.services.s3_service import s3_service
+from app.services.storage import NotModified, RangeNotSatisfiable, UnsupportedOperation, parse_range_header
+from app.services.thumbnail_service import open_source, remove_source, thumbnail_service
 from app.utils.decorators import measure_time
-from pydantic import BaseModel
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.responses import WholeFileResponse
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
@@ -93,3 +101,299 @@ def get_bucket_info():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+
+class PresignedUploadRequest(BaseModel):
+    """Payload to request a presigned PUT URL"""
+    maintenance_id: int
+    image_name: str
+    content_type: Optional[str] = None
+    expires_in: int = Field(default=settings.S3_PRESIGNED_EXPIRES_SECONDS, gt=0, le=7 * 24 * 3600)
+
+
+class BatchDeleteRequest(BaseModel):
+    """Images of one maintenance to delete"""
+    maintenance_id: int
+    image_names: List[str] = Field(..., min_length=1, max_length=10000)
+
+
+class PrefixCopyRequest(BaseModel):
+    """Copy (or move) every image of a maintenance to another one"""
+    target_maintenance_id: int
+    move: bool = False
+
+
+def batch_response(results: List[dict], ok_status: str) -> dict:
+    return {
+        ok_status: sum(1 for r in results if r["status"] != "error"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+    }
+
+
+def image_key(maintenance_id: int, image_name: str) -> str:
+    try:
+        return s3_service.object_key(maintenance_id, image_name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.put("/images/{maintenance_id}/{image_name}", status_code=status.HTTP_201_CREATED)
+@measure_time
+async def upload_maintenance_image(maintenance_id: int, image_name: str, request: Request):
+    """
+    Uploads the raw request body as a maintenance image.
+
+    The body is streamed to S3 with a multipart upload, one part
+    (S3_MULTIPART_PART_SIZE) in memory at a time. Files larger than
+    S3_MAX_UPLOAD_BYTES are rejected with 413; for those, use a presigned URL.
+
+    Bodies up to THUMBNAIL_MAX_SOURCE_BYTES are also written to a temporary
+    file, which the process pool renders the thumbnails from once the
+    original is stored.
+    """
+    key = image_key(maintenance_id, image_name)
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > settings.S3_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image too large")
+    content_type = request.headers.get("content-type", "application/octet-stream")
+    source = await run_in_threadpool(open_source) if settings.THUMBNAILS_ENABLED else None
+    received = 0
+
+    async def body():
+        nonlocal source, received
+        async for chunk in request.stream():
+            received += len(chunk)
+            if source is not None:
+                if received > settings.THUMBNAIL_MAX_SOURCE_BYTES:
+                    remove_source(source)
+                    source = None
+                else:
+                    await run_in_threadpool(source.write, chunk)
+            yield chunk
+
+    try:
+        try:
+            result = await s3_service.upload_stream(key, body(), content_type=content_type, max_bytes=settings.S3_MAX_UPLOAD_BYTES)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+        thumbnails = {}
+        if source is not None and received:
+            source.close()
+            thumbnails = await thumbnail_service.generate(maintenance_id, image_name, source.name, content_type)
+    finally:
+        if source is not None:
+            remove_source(source)
+    return {**result, "thumbnails": thumbnails}
+
+
+@router.get("/images/{maintenance_id}")
+@measure_time
+def list_maintenance_images(
+    maintenance_id: int,
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    after: Optional[str] = Query(default=None, description="Cursor from a previous page (next_cursor)"),
+):
+    """
+    Lists the images of a maintenance, one page of at most limit
+    (default S3_LISTING_PAGE_SIZE) per request. Follow next_cursor (also in
+    the X-Next-Cursor header) to get the next page.
+    """
+    try:
+        page = s3_service.list_images(maintenance_id, limit, after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return page
+
+
+def object_response(key: str, request: Request, cache_control: Optional[str] = None) -> Response:
+    """
+    The object at key as a download response: whole (200), or the single
+    requested Range (206); 304 when If-None-Match has its ETag.
+    """
+    byte_range = parse_range_header(request.headers.get("range"))
+    headers = {"Accept-Ranges": "bytes"}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    try:
+        obj = s3_service.open_object(key, byte_range, request.headers.get("if-none-match"))
+    except NotModified as e:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": e.etag})
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    except RangeNotSatisfiable as e:
+        raise HTTPException(status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    headers["ETag"] = obj["etag"]
+    headers["Content-Length"] = str(obj["content_length"])
+    if "path" in obj:
+        return WholeFileResponse(obj["path"], media_type=obj["content_type"], headers=headers, stat_result=obj["stat"])
+    if obj["content_range"]:
+        headers["Content-Range"] = obj["content_range"]
+    return StreamingResponse(
+        obj["body"],
+        status_code=status.HTTP_206_PARTIAL_CONTENT if obj["content_range"] else status.HTTP_200_OK,
+        media_type=obj["content_type"],
+        headers=headers,
+    )
+
+
+@router.get("/images/{maintenance_id}/{image_name}", response_class=StreamingResponse)
+@measure_time
+def download_maintenance_image(maintenance_id: int, image_name: str, request: Request):
+    """
+    Streams a maintenance image in S3_DOWNLOAD_CHUNK_SIZE chunks. A single
+    Range (bytes=first-last, first-, -suffix) returns 206 with that slice.
+
+    On the local backend whole files are sent by path (FileResponse,
+    zero-copy where the server supports it) and ranges are read from a
+    memory map.
+    """
+    return object_response(image_key(maintenance_id, image_name), request)
+
+
+@router.get("/images/{maintenance_id}/thumbs/{size}/{image_name}", response_class=StreamingResponse)
+@measure_time
+def download_maintenance_thumbnail(maintenance_id: int, size: int, image_name: str, request: Request):
+    """
+    A thumbnail rendered on upload (size: one of THUMBNAIL_SIZES), cached by
+    clients for THUMBNAIL_CACHE_SECONDS and then revalidated by ETag.
+    """
+    if size not in settings.THUMBNAIL_SIZES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown thumbnail size")
+    image_key(maintenance_id, image_name)
+    return object_response(
+        thumbnail_service.thumbnail_key(maintenance_id, size, image_name),
+        request,
+        cache_control=f"public, max-age={settings.THUMBNAIL_CACHE_SECONDS}",
+    )
+
+
+@router.post("/presigned-upload")
+@measure_time
+def presigned_upload_url(data: PresignedUploadRequest):
+    """
+    Returns a presigned PUT URL: the client uploads the file straight to S3.
+    """
+    key = image_key(data.maintenance_id, data.image_name)
+    try:
+        return s3_service.presigned_url("PUT", key, data.expires_in, data.content_type)
+    except UnsupportedOperation as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/presigned-download/{maintenance_id}/{image_name}")
+@measure_time
+def presigned_download_url(maintenance_id: int, image_name: str, expires_in: Optional[int] = Query(default=None, gt=0, le=7 * 24 * 3600)):
+    """
+    Returns a presigned GET URL: the client downloads the file straight from S3.
+    """
+    key = image_key(maintenance_id, image_name)
+    try:
+        return s3_service.presigned_url("GET", key, expires_in)
+    except UnsupportedOperation as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post("/images/{maintenance_id}/batch")
+@measure_time
+async def upload_maintenance_images(maintenance_id: int, files: List[UploadFile] = File(...)):
+    """
+    Uploads many images (multipart/form-data, field "files") concurrently on
+    a pool of S3_MAX_CONCURRENCY threads, then renders their thumbnails.
+    Returns one result per file.
+    """
+    if len(files) > settings.S3_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.S3_BATCH_MAX_FILES} files per request",
+        )
+    entries = [(f.filename or "", f.file, f.content_type or "application/octet-stream") for f in files]
+    try:
+        results = await run_in_threadpool(s3_service.upload_many, maintenance_id, entries)
+        uploaded = [(entry, result) for entry, result in zip(entries, results) if result["status"] == "uploaded"]
+        thumbnails = await thumbnail_service.generate_many(maintenance_id, [entry for entry, _ in uploaded])
+        for (_, result), keys in zip(uploaded, thumbnails):
+            result["thumbnails"] = keys
+    finally:
+        for f in files:
+            await f.close()
+    return batch_response(results, "uploaded")
+
+
+@router.post("/images/delete-batch")
+@measure_time
+def delete_maintenance_images(data: BatchDeleteRequest):
+    """
+    Deletes many images, and their thumbnails, with delete_objects (1000
+    keys per S3 request, requests sent concurrently). Returns one result
+    per image, in order; invalid names are reported without being deleted.
+    """
+    results, valid = [], {}
+    for index, name in enumerate(data.image_names):
+        try:
+            valid[index] = (name, s3_service.object_key(data.maintenance_id, name))
+            results.append(None)
+        except ValueError as e:
+            results.append({"object_key": None, "status": "error", "error": str(e)})
+    keys = [key for _, key in valid.values()]
+    thumbnails = [key for name, _ in valid.values() for key in thumbnail_service.thumbnail_keys(data.maintenance_id, name)]
+    try:
+        deleted = s3_service.delete_many(keys + thumbnails)[:len(keys)]
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    for index, result in zip(valid, deleted):
+        results[index] = result
+    return batch_response(results, "deleted")
+
+
+@router.post("/images/{maintenance_id}/copy")
+@measure_time
+def copy_maintenance_images(maintenance_id: int, data: PrefixCopyRequest):
+    """
+    Copies (server side) or moves every image of a maintenance to another
+    maintenance. Returns one result per object.
+    """
+    if data.target_maintenance_id == maintenance_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Source and target are the same")
+    try:
+        results = s3_service.copy_prefix(
+            f"maintenance/{maintenance_id}/", f"maintenance/{data.target_maintenance_id}/", move=data.move
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    return batch_response(results, "moved" if data.move else "copied")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 
 class CategoryRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -25,4 +25,18 @@ class ItemUpdate(BaseModel):
 class ItemRead(ItemBase):
     model_config = ConfigDict(from_attributes=True)
     id: int
-    category: Optional[CategoryRead] = None
\ No newline at end of file
+    category: Optional[CategoryRead] = None
+
+
+class ItemBulkResult(BaseModel):
+    index: int
+    sku: Optional[str] = None
+    status: str  # "created" | "updated" | "error"
+    id: Optional[int] = None
+    errors: List[str] = []
+
+class ItemBulkResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[ItemBulkResult]
@@ -4,7 +4,7 @@ from datetime import datetime
 
 class OrderItem(BaseModel):
     item_id: int
-    quantity: int = 1
+    quantity: int = Field(default=1, gt=0)
 
 class OrderCreate(BaseModel):
     report: str
@@ -0,0 +1,84 @@
+"""
+Production entry point: uvicorn with one worker per CPU.
+
+    python -m app.serve
+    python -m app.serve --workers 4 --port 9000
+
+uvloop and httptools are used when installed (pip install "uvicorn[standard]").
+"""
+import argparse
+import logging
+import os
+import uvicorn
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers() -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+
+def prepare_database(workers: int) -> None:
+    """
+    One-time setup in the parent process, before any worker starts: create
+    the schema once instead of racing create_all in every worker, and open
+    the database so a SQLite file is switched to WAL before workers share it.
+    """
+    from app.db.session import Base, engine, is_memory_sqlite, sync_database_url
+    import app.models  # noqa: F401  registers the tables
+
+    url = sync_database_url(settings.DATABASE_URL)
+    if workers > 1 and is_memory_sqlite(url):
+        raise SystemExit("An in-memory SQLite database cannot be shared by several workers; use a file or a server database")
+    if workers > 1 and url.get_backend_name() == "sqlite" and settings.SQLITE_JOURNAL_MODE != "WAL":
+        logger.warning("SQLITE_JOURNAL_MODE=%s: writers in different workers will block readers; WAL is recommended",
+                       settings.SQLITE_JOURNAL_MODE)
+
+    if settings.create_schema_on_startup:
+        Base.metadata.create_all(bind=engine)
+    else:
+        with engine.connect():
+            pass
+    # Workers are spawned, not forked; drop the parent's connections anyway
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(args.workers)
+
+    # The schema is already in place and nobody should open a browser.
+    # Spawned workers read the environment; a single worker runs in-process.
+    for name in ("CREATE_SCHEMA_ON_STARTUP", "OPEN_BROWSER_ON_STARTUP"):
+        os.environ[name] = "false"
+        setattr(settings, name, False)
+    # Per-worker pools (thumbnails) split the cores among the workers
+    os.environ["SERVER_WORKERS"] = str(args.workers)
+    settings.SERVER_WORKERS = args.workers
+
+    logger.info("Serving %s on %s:%d with %d workers (%s database)", settings.PROJECT_NAME, args.host, args.port,
+                args.workers, make_url(settings.DATABASE_URL).get_backend_name())
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="auto",
+        http="auto",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
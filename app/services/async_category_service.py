@@ -0,0 +1,27 @@
+from typing import Dict, Optional
+from app.db.session import AsyncSessionLocal
+from app.services.category_service import CategoryService, category_cache
+from app.services.version_service import version_key
+
+class AsyncCategoryService:
+    """
+    asyncio counterpart of CategoryService (see AsyncItemService).
+    """
+
+    @staticmethod
+    async def create_category(data) -> dict:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(CategoryService._create_category, data)
+
+    @staticmethod
+    async def list_categories(limit: Optional[int] = None, after_id: Optional[int] = None,
+                              versions: Optional[Dict[str, int]] = None):
+        async def load():
+            async with AsyncSessionLocal() as session:
+                return await session.run_sync(CategoryService._list_categories, limit, after_id)
+        return await category_cache.get_or_load_async(("list_categories", version_key(versions), limit, after_id), load)
+
+    @staticmethod
+    async def patch_category(category_id: int, update_data: dict):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(CategoryService._patch_category, category_id, update_data)
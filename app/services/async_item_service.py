@@ -0,0 +1,45 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.db.session import AsyncSessionLocal
+from app.services.item_service import ItemFilter, ItemService, item_cache
+from app.services.version_service import version_key
+
+class AsyncItemService:
+    """
+    asyncio counterpart of ItemService, used when DATABASE_URL names an async
+    driver. Queries are the ones in ItemService, executed through
+    AsyncSession.run_sync so the event loop is never blocked on the database.
+    """
+
+    @staticmethod
+    async def create_item(data) -> object:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(ItemService._create_item, data)
+
+    @staticmethod
+    async def bulk_upsert_items(rows: List[dict], batch_size: int = 500) -> List[dict]:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(ItemService._bulk_upsert_items, rows, batch_size)
+
+    @staticmethod
+    async def list_items(limit: Optional[int] = None, after_id: Optional[int] = None,
+                         filters: ItemFilter = ItemFilter(), after_value: Any = None,
+                         versions: Optional[Dict[str, int]] = None):
+        async def load():
+            async with AsyncSessionLocal() as session:
+                return await session.run_sync(ItemService._list_items, limit, after_id, filters, after_value)
+        return await item_cache.get_or_load_async(("list_items", version_key(versions), limit, after_id, filters, after_value), load)
+
+    @staticmethod
+    async def iter_items(batch_size: int = 1000) -> AsyncIterator[dict]:
+        """
+        Stream every item with a server-side cursor (AsyncSession.stream).
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(ItemService._export_statement(batch_size))
+            async for row in result:
+                yield ItemService._item_row(row)
+
+    @staticmethod
+    async def patch_item(item_id: int, update_data: dict):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(ItemService._patch_item, item_id, update_data)
@@ -0,0 +1,36 @@
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.db.session import AsyncSessionLocal
+from app.services.order_service import OrderService
+
+class AsyncOrderService:
+    """
+    asyncio counterpart of OrderService (see AsyncItemService).
+    """
+
+    @staticmethod
+    async def create_order(report: str, items_payload: List[Dict], request_key: Optional[str] = None) -> Tuple[bytes, bool]:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(OrderService._create_order, report, items_payload, request_key)
+
+    @staticmethod
+    async def list_orders(limit: Optional[int] = None, after_id: Optional[int] = None):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(OrderService._list_orders, limit, after_id)
+
+    @staticmethod
+    async def iter_orders(batch_size: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Stream every order with its items with a server-side cursor.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(OrderService._export_statement(batch_size))
+            current = None
+            async for row in result:
+                if current is None or current["id"] != row.id:
+                    if current is not None:
+                        yield current
+                    current = OrderService._export_order(row)
+                if row.item_id is not None:
+                    current["items"].append({"item_id": row.item_id, "quantity": row.quantity})
+            if current is not None:
+                yield current
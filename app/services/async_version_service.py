@@ -0,0 +1,13 @@
+from typing import Dict
+from app.db.session import AsyncSessionLocal
+from app.services.version_service import VersionService
+
+class AsyncVersionService:
+    """
+    asyncio counterpart of VersionService (see AsyncItemService).
+    """
+
+    @staticmethod
+    async def get_versions(*tables: str) -> Dict[str, int]:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(VersionService._get_versions, *tables)
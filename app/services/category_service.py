@@ -1,15 +1,33 @@
+from typing import Dict, Optional
 from sqlalchemy.exc import SQLAlchemyError
 from app.db.session import SessionLocal
+from app.utils.cache import create_cache
+from app.services.version_service import VersionService, version_key
+
+# Category list pages, invalidated on every category write
+category_cache = create_cache("categories")
 
 class CategoryService:
+    # Public methods own the session; the _-prefixed versions take an open
+    # session so AsyncCategoryService can run the same code via run_sync.
+
     @staticmethod
     def create_category(data) -> dict:
         session = SessionLocal()
+        try:
+            return CategoryService._create_category(session, data)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _create_category(session, data) -> dict:
         try:
             from app.models.category import Category
             category = Category(**data)
             session.add(category)
             session.commit()
+            VersionService.bump(session, "categories")
+            category_cache.invalidate()
             session.refresh(category)
             # Convertir a dict MIENTRAS la sesión esté abierta
             result = {
@@ -20,29 +38,47 @@ class CategoryService:
         except SQLAlchemyError:
             session.rollback()
             raise
-        finally:
-            session.close()
 
     @staticmethod
-    def list_categories():
+    def list_categories(limit: Optional[int] = None, after_id: Optional[int] = None,
+                        versions: Optional[Dict[str, int]] = None):
+        """
+        One page of categories, cached under versions (see ItemService.list_items).
+        """
+        def load():
+            session = SessionLocal()
+            try:
+                return CategoryService._list_categories(session, limit, after_id)
+            finally:
+                session.close()
+        return category_cache.get_or_load(("list_categories", version_key(versions), limit, after_id), load)
+
+    @staticmethod
+    def _list_categories(session, limit: Optional[int] = None, after_id: Optional[int] = None):
+        from app.models.category import Category
+        query = session.query(Category)
+        if after_id is not None:
+            query = query.filter(Category.id > after_id)
+        categories = query.order_by(Category.id).limit(limit).all()
+        # Convertir a list de dicts mientras la sesión esté abierta
+        return [
+            {
+                "id": category.id,
+                "name": category.name
+            }
+            for category in categories
+        ]
+
+    @staticmethod
+    def patch_category(category_id: int, update_data: dict):
         session = SessionLocal()
         try:
-            from app.models.category import Category
-            categories = session.query(Category).all()
-            # Convertir a list de dicts mientras la sesión esté abierta
-            return [
-                {
-                    "id": category.id,
-                    "name": category.name
-                }
-                for category in categories
-            ]
+            return CategoryService._patch_category(session, category_id, update_data)
         finally:
             session.close()
 
     @staticmethod
-    def patch_category(category_id: int, update_data: dict):
-        session = SessionLocal()
+    def _patch_category(session, category_id: int, update_data: dict):
         try:
             from app.models.category import Category
             category = session.query(Category).filter(Category.id == category_id).first()
@@ -51,7 +87,13 @@ class CategoryService:
             for key, value in update_data.items():
                 if hasattr(category, key) and value is not None:
                     setattr(category, key, value)
+            session.flush()
             session.commit()
+            VersionService.bump(session, "categories")
+            # Items embed their category name
+            from app.services.item_service import item_cache
+            category_cache.invalidate()
+            item_cache.invalidate()
             session.refresh(category)
             # Convertir a dict MIENTRAS la sesión esté abierta
             result = {
@@ -62,5 +104,3 @@ class CategoryService:
         except SQLAlchemyError:
             session.rollback()
             raise
-        finally:
-            session.close()
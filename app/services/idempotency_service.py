@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.utils.cache import create_cache
+
+logger = logging.getLogger(__name__)
+
+# Recent (resource_type, request_key) -> response, so replays are answered
+# without touching the database. An entry never outlives its key.
+idempotency_cache = create_cache(
+    "idempotency", maxsize=settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
+
+class IdempotencyService:
+    """
+    Lookup, expiry and purge of idempotency_keys rows. Keys older than
+    IDEMPOTENCY_TTL_SECONDS are treated as unused.
+    """
+
+    @staticmethod
+    def _cutoff() -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+    @staticmethod
+    def remaining_ttl(key) -> float:
+        """
+        Seconds until key expires (SQLite returns naive UTC timestamps).
+        """
+        created_at = key.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return (created_at - IdempotencyService._cutoff()).total_seconds()
+
+    @staticmethod
+    def _find(session, resource_type: str, request_key: str):
+        """
+        Live IdempotencyKey for request_key, or None. An expired key is deleted
+        in the caller's transaction so the key can be reused.
+        """
+        from sqlalchemy import delete, select
+        from app.models.idempotency import IdempotencyKey
+
+        key = session.scalars(
+            select(IdempotencyKey).where(
+                IdempotencyKey.resource_type == resource_type,
+                IdempotencyKey.request_key == request_key,
+            )
+        ).first()
+        if key is None:
+            return None
+        if IdempotencyService.remaining_ttl(key) <= 0:
+            session.execute(delete(IdempotencyKey).where(IdempotencyKey.id == key.id))
+            session.expunge(key)
+            return None
+        return key
+
+    @staticmethod
+    def purge_expired(batch_size: int = 500, max_batches: Optional[int] = None) -> int:
+        session = SessionLocal()
+        try:
+            return IdempotencyService._purge_expired(session, batch_size, max_batches)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _purge_expired(session, batch_size: int = 500, max_batches: Optional[int] = None) -> int:
+        """
+        Delete expired keys batch_size rows per transaction, so the write lock
+        is only held briefly; returns the number of rows deleted.
+        """
+        from sqlalchemy import delete, select
+        from app.models.idempotency import IdempotencyKey
+
+        cutoff = IdempotencyService._cutoff()
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = session.scalars(
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.created_at < cutoff)
+                .order_by(IdempotencyKey.created_at)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+            session.commit()
+            deleted += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+        return deleted
+
+    @staticmethod
+    async def purge_periodically(interval: float, batch_size: int) -> None:
+        """
+        Background job started by the app lifespan; runs the purge in a worker
+        thread every interval seconds until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                deleted = await asyncio.to_thread(IdempotencyService.purge_expired, batch_size)
+            except Exception:
+                logger.exception("Idempotency key purge failed")
+                continue
+            if deleted:
+                logger.info(f"Purged {deleted} expired idempotency keys")
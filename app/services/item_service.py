@@ -1,16 +1,71 @@
-from sqlalchemy.exc import SQLAlchemyError
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from app.db.session import SessionLocal
+from app.utils.cache import create_cache
+from app.services.version_service import VersionService, version_key
+
+# Columns overwritten when a bulk row hits an existing SKU
+UPSERT_COLUMNS = ("name", "price", "stock", "category_id")
+
+# Item list pages. Invalidated by every write that changes an item row or the
+# category embedded in it (category renames, stock reserved by orders).
+item_cache = create_cache("items")
+
+# ?sort= values accepted by list_items ("-" for descending); each has an
+# index ending in id so the keyset (column, id) is a range scan
+ITEM_SORTS = ("id", "-id", "price", "-price", "stock", "-stock")
+
+class ItemFilter(NamedTuple):
+    """
+    Filters and sort order of an item list (hashable: part of the cache key).
+    """
+    category_id: Optional[int] = None
+    sku_prefix: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    stock_below: Optional[int] = None
+    sort: str = "id"
+
+    @property
+    def sort_field(self) -> str:
+        return self.sort.lstrip("-")
+
+
+def next_char(char: str) -> str:
+    """
+    The code point after char, skipping the surrogates (U+D800..U+DFFF),
+    which cannot be encoded in a query.
+    """
+    code = ord(char) + 1
+    return chr(0xE000 if 0xD800 <= code <= 0xDFFF else code)
 
 class ItemService:
+    # Public methods own the session lifecycle; the _-prefixed versions take an
+    # open session so AsyncItemService can run the same code via run_sync.
+
     @staticmethod
     def create_item(data) -> object:
         session = SessionLocal()
+        try:
+            return ItemService._create_item(session, data)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _create_item(session, data) -> object:
         try:
             # Local import avoids module import cycles
             from app.models.item import Item
             item = Item(**data)
             session.add(item)
-            session.commit()
+            try:
+                session.commit()
+                VersionService.bump(session, "items")
+            except IntegrityError:
+                session.rollback()
+                raise ValueError(f"SKU {data['sku']} already exists")
+            item_cache.invalidate()
             session.refresh(item)
             # Convert to dict while the session is open
             result = {
@@ -29,39 +84,239 @@ class ItemService:
         except SQLAlchemyError:
             session.rollback()
             raise
+
+    @staticmethod
+    def bulk_upsert_items(rows: List[dict], batch_size: int = 500) -> List[dict]:
+        """
+        Create or update many items keyed by SKU.
+
+        Rows are written batch_size at a time, each batch as one multi-row
+        upsert committed on its own. Returns one result per input row, in
+        order; a SKU repeated within the request is only applied once.
+        """
+        session = SessionLocal()
+        try:
+            return ItemService._bulk_upsert_items(session, rows, batch_size)
         finally:
             session.close()
 
     @staticmethod
-    def list_items():
+    def _bulk_upsert_items(session, rows: List[dict], batch_size: int = 500) -> List[dict]:
+        results: List[Optional[dict]] = [None] * len(rows)
+        first_index: Dict[str, int] = {}
+        pending: List[int] = []
+        for index, data in enumerate(rows):
+            sku = data["sku"]
+            if sku in first_index:
+                results[index] = {
+                    "sku": sku,
+                    "status": "error",
+                    "id": None,
+                    "errors": [f"Duplicate SKU in request (first seen at index {first_index[sku]})"]
+                }
+            else:
+                first_index[sku] = index
+                pending.append(index)
+
+        for start in range(0, len(pending), batch_size):
+            indexes = pending[start:start + batch_size]
+            batch = [rows[i] for i in indexes]
+            try:
+                ids, existing = ItemService._upsert_batch(session, batch)
+                session.commit()
+                VersionService.bump(session, "items")
+                item_cache.invalidate()
+            except SQLAlchemyError as e:
+                # A failed batch does not undo the batches already committed
+                session.rollback()
+                message = str(getattr(e, "orig", None) or e)
+                for i in indexes:
+                    results[i] = {"sku": rows[i]["sku"], "status": "error", "id": None, "errors": [message]}
+                continue
+            for i in indexes:
+                sku = rows[i]["sku"]
+                results[i] = {
+                    "sku": sku,
+                    "status": "updated" if sku in existing else "created",
+                    "id": ids.get(sku),
+                    "errors": []
+                }
+        return results
+
+    @staticmethod
+    def _upsert_batch(session, batch: List[dict]) -> Tuple[Dict[str, int], Set[str]]:
+        """
+        Upsert one batch of rows; returns (sku -> id, SKUs that already existed).
+        """
+        from sqlalchemy import bindparam, select
+        from app.models.item import Item
+
+        skus = [data["sku"] for data in batch]
+        existing = set(session.scalars(select(Item.sku).where(Item.sku.in_(skus))))
+
+        dialect = session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            # Single INSERT ... VALUES (...), (...) ON CONFLICT (sku) DO UPDATE
+            stmt = insert(Item.__table__).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Item.sku],
+                set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+            ).returning(Item.id, Item.sku)
+            ids = {row.sku: row.id for row in session.execute(stmt)}
+            return ids, existing
+
+        # Generic path: executemany UPDATE for known SKUs and INSERT for new ones
+        table = Item.__table__
+        updates = [
+            {"b_sku": data["sku"], **{f"b_{column}": data[column] for column in UPSERT_COLUMNS}}
+            for data in batch if data["sku"] in existing
+        ]
+        inserts = [data for data in batch if data["sku"] not in existing]
+        if updates:
+            session.execute(
+                table.update()
+                .where(table.c.sku == bindparam("b_sku"))
+                .values({column: bindparam(f"b_{column}") for column in UPSERT_COLUMNS}),
+                updates,
+            )
+        if inserts:
+            session.execute(table.insert(), inserts)
+        ids = dict(session.execute(select(Item.sku, Item.id).where(Item.sku.in_(skus))).tuples().all())
+        return ids, existing
+
+    @staticmethod
+    def list_items(limit: Optional[int] = None, after_id: Optional[int] = None,
+                   filters: ItemFilter = ItemFilter(), after_value: Any = None,
+                   versions: Optional[Dict[str, int]] = None):
+        """
+        One page of items, cached. versions (the table_versions counters the
+        ETag is built from) is part of the cache key, so a write made by any
+        worker is seen as soon as its version bump is.
+        """
+        def load():
+            session = SessionLocal()
+            try:
+                return ItemService._list_items(session, limit, after_id, filters, after_value)
+            finally:
+                session.close()
+        return item_cache.get_or_load(("list_items", version_key(versions), limit, after_id, filters, after_value), load)
+
+    @staticmethod
+    def _list_items(session, limit: Optional[int] = None, after_id: Optional[int] = None,
+                    filters: ItemFilter = ItemFilter(), after_value: Any = None):
+        # One LEFT JOIN selecting only the response columns: no ORM identities,
+        # no selectin load of Item.category. Keyset pagination on (sort column, id).
+        statement = ItemService._filtered_statement(filters, after_id, after_value)
+        return [ItemService._item_row(row) for row in session.execute(statement.limit(limit))]
+
+    @staticmethod
+    def _filtered_statement(filters: ItemFilter, after_id: Optional[int] = None, after_value: Any = None):
+        """
+        _list_statement narrowed by filters, ordered by filters.sort and
+        starting after the (after_value, after_id) keyset position.
+        """
+        from sqlalchemy import tuple_
+        from app.models.item import Item
+        statement = ItemService._list_statement().order_by(None)
+        if filters.category_id is not None:
+            statement = statement.where(Item.category_id == filters.category_id)
+        if filters.sku_prefix:
+            # Half-open range instead of LIKE so ix_items_sku is used. It means
+            # "starts with" under code point order: SQLite's BINARY collation,
+            # and the "C" collation items.sku has on PostgreSQL.
+            statement = statement.where(Item.sku >= filters.sku_prefix)
+            # Trailing U+10FFFF cannot be incremented: bump the character before it
+            stem = filters.sku_prefix.rstrip(chr(sys.maxunicode))
+            if stem:
+                statement = statement.where(Item.sku < stem[:-1] + next_char(stem[-1]))
+        if filters.min_price is not None:
+            statement = statement.where(Item.price >= filters.min_price)
+        if filters.max_price is not None:
+            statement = statement.where(Item.price <= filters.max_price)
+        if filters.stock_below is not None:
+            statement = statement.where(Item.stock < filters.stock_below)
+
+        descending = filters.sort.startswith("-")
+        column = getattr(Item, filters.sort_field)
+        if column is Item.id:
+            if after_id is not None:
+                statement = statement.where(Item.id < after_id if descending else Item.id > after_id)
+            return statement.order_by(Item.id.desc() if descending else Item.id)
+        if after_id is not None:
+            position = tuple_(column, Item.id)
+            statement = statement.where(position < (after_value, after_id) if descending else position > (after_value, after_id))
+        if descending:
+            return statement.order_by(column.desc(), Item.id.desc())
+        return statement.order_by(column, Item.id)
+
+    @staticmethod
+    def iter_items(batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Stream every item as a dict, fetching batch_size rows per round trip.
+
+        Selects plain columns (no ORM identities) so memory stays flat no
+        matter how large the catalog is. The session lives as long as the
+        generator does.
+        """
         session = SessionLocal()
         try:
-            from app.models.item import Item
-            from app.models.category import Category
-            # Explicit LEFT JOIN
-            items = session.query(Item).outerjoin(Category).all()
-            # Convert to dict while the session is open
-            return [
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "sku": item.sku,
-                    "price": item.price,
-                    "stock": item.stock,
-                    "category_id": item.category_id,
-                    "category": {
-                        "id": item.category.id,
-                        "name": item.category.name
-                    } if item.category else None
-                }
-                for item in items
-            ]
+            for row in session.execute(ItemService._export_statement(batch_size)):
+                yield ItemService._item_row(row)
         finally:
             session.close()
 
+    @staticmethod
+    def _list_statement():
+        from sqlalchemy import select
+        from app.models.item import Item
+        from app.models.category import Category
+        return (
+            select(
+                Item.id, Item.name, Item.sku, Item.price, Item.stock, Item.category_id,
+                Category.name.label("category_name"),
+            )
+            .outerjoin(Category, Item.category_id == Category.id)
+            .order_by(Item.id)
+        )
+
+    @staticmethod
+    def _export_statement(batch_size: int):
+        return ItemService._list_statement().execution_options(yield_per=batch_size)
+
+    @staticmethod
+    def _item_row(row) -> dict:
+        """
+        Response dict for a row of _list_statement, keys in ItemRead field
+        order so the fast JSON path encodes the same bytes as response_model.
+        """
+        item_id, name, sku, price, stock, category_id, category_name = row
+        return {
+            "name": name,
+            "sku": sku,
+            "price": price,
+            "stock": stock,
+            "category_id": category_id,
+            "id": item_id,
+            "category": {
+                "id": category_id,
+                "name": category_name
+            } if category_name is not None else None
+        }
+
     @staticmethod
     def patch_item(item_id: int, update_data: dict):
         session = SessionLocal()
+        try:
+            return ItemService._patch_item(session, item_id, update_data)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _patch_item(session, item_id: int, update_data: dict):
         try:
             from app.models.item import Item
             item = session.query(Item).filter(Item.id == item_id).first()
@@ -70,7 +325,10 @@ class ItemService:
             for key, value in update_data.items():
                 if hasattr(item, key) and value is not None:
                     setattr(item, key, value)
+            session.flush()
             session.commit()
+            VersionService.bump(session, "items")
+            item_cache.invalidate()
             session.refresh(item)
             # Convert to dict while the session is open
             result = {
@@ -89,5 +347,3 @@ class ItemService:
         except SQLAlchemyError:
             session.rollback()
             raise
-        finally:
-            session.close()
\ No newline at end of file
@@ -1,124 +1,230 @@
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from app.db.session import SessionLocal
+from app.services.idempotency_service import IdempotencyService, idempotency_cache
+from app.services.version_service import VersionService
+from app.utils.cache import MISSING
+
+# Max ids bound per IN (...) clause, keeps us under SQLite's variable limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+class InsufficientStockError(ValueError):
+    """Raised when an order asks for more units than an item has in stock."""
 
 class OrderService:
 
+    # Public methods own the session; the _-prefixed versions take an open
+    # session so AsyncOrderService can run the same code via run_sync.
+
     @staticmethod
-    def create_order(report: str, items_payload: List[Dict], request_key: Optional[str] = None) -> Tuple[object, bool]:
-        
+    def create_order(report: str, items_payload: List[Dict], request_key: Optional[str] = None) -> Tuple[bytes, bool]:
+        """
+        Create an order; returns (serialized OrderRead JSON, created). A replayed
+        idempotency key returns the bytes stored with it and created=False.
+        """
         session = SessionLocal()
+        try:
+            return OrderService._create_order(session, report, items_payload, request_key)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _create_order(session, report: str, items_payload: List[Dict], request_key: Optional[str] = None) -> Tuple[bytes, bool]:
         try:
             # Local imports to avoid import cycles
             from app.models.order import Order, order_items
-            from app.models.item import Item
             from app.models.idempotency import IdempotencyKey
 
-            # Check previous idempotency
+            # Check previous idempotency: recent keys are answered from memory
             if request_key:
-                existing = (
-                    session.query(IdempotencyKey)
-                    .filter_by(request_key=request_key, resource_type="order")
-                    .first()
-                )
+                cached = idempotency_cache.get(("order", request_key))
+                if cached is not MISSING:
+                    return cached, False
+                existing = IdempotencyService._find(session, "order", request_key)
                 if existing and existing.resource_id:
                     # Return existing order without creating a new one
-                    existing_order = session.get(Order, existing.resource_id)
-                    # Fetch order items
-                    from sqlalchemy import select
-                    items_query = session.execute(
-                        select(order_items).where(order_items.c.order_id == existing_order.id)
-                    ).fetchall()
-                    result = {
-                        "id": existing_order.id,
-                        "report": existing_order.report,
-                        "items": [
-                            {"item_id": row.item_id, "quantity": row.quantity}
-                            for row in items_query
-                        ]
-                    }
-                    return result, False
+                    return OrderService._replay(session, existing), False
 
             try:
-                # Create order
+                # Merge repeated item ids and check every item exists up front,
+                # before the transaction takes the write lock
+                lines = OrderService._merge_lines(items_payload)
+                OrderService._ensure_items_exist(session, list(lines))
+
+                # Decrement stock atomically in the database, all or nothing
+                OrderService._reserve_stock(session, lines)
+
+                # Create order (created_at comes back with INSERT ... RETURNING)
                 order = Order(report=report)
                 session.add(order)
                 session.flush()  # gets order.id
 
-                # Link items (association table)
-                for it in items_payload:
-                    item_id = it.get("item_id")
-                    qty = it.get("quantity", 1)
-                    item = session.get(Item, item_id)
-                    if item is None:
-                        # Raising triggers a rollback
-                        raise ValueError(f"Item {item_id} not found")
-                    # Insert into order_items table
+                # Link items (association table) with a single executemany
+                if lines:
                     session.execute(
-                        order_items.insert().values(order_id=order.id, item_id=item.id, quantity=qty)
+                        order_items.insert(),
+                        [
+                            {"order_id": order.id, "item_id": item_id, "quantity": qty}
+                            for item_id, qty in lines.items()
+                        ]
                     )
 
-                # Register idempotency key
+                # Build the response from what we just wrote, no re-read needed
+                body = OrderService._serialize({
+                    "id": order.id,
+                    "report": order.report,
+                    "items": [
+                        {"item_id": item_id, "quantity": qty}
+                        for item_id, qty in lines.items()
+                    ],
+                    "created_at": order.created_at
+                })
+
+                # Register idempotency key, with the response for replays
                 if request_key:
                     idemp = IdempotencyKey(
-                        request_key=request_key, resource_type="order", resource_id=order.id
+                        request_key=request_key, resource_type="order", resource_id=order.id,
+                        response_body=body.decode()
                     )
                     session.add(idemp)
 
                 # Commit transaction
                 session.commit()
-                session.refresh(order)
-                # Fetch order items
-                from sqlalchemy import select
-                items_query = session.execute(
-                    select(order_items).where(order_items.c.order_id == order.id)
-                ).fetchall()
-                
-                # Convert to dict while the session is open
-                result = {
-                    "id": order.id,
-                    "report": order.report,
-                    "items": [
-                        {"item_id": row.item_id, "quantity": row.quantity}
-                        for row in items_query
-                    ]
-                }
-                return result, True
+                # ETag versions: the new order and the stock it reserved
+                VersionService.bump(session, *(("items", "orders") if lines else ("orders",)))
+                if lines:
+                    # Stock changed: cached item pages are stale
+                    from app.services.item_service import item_cache
+                    item_cache.invalidate()
+
+                if request_key:
+                    idempotency_cache.set(("order", request_key), body)
+                return body, True
 
             except IntegrityError as ie:
                 # Can happen if concurrent requests insert the same idempotency key
                 session.rollback()
                 if request_key:
-                    existing = (
-                        session.query(IdempotencyKey)
-                        .filter_by(request_key=request_key, resource_type="order")
-                        .first()
-                    )
+                    existing = IdempotencyService._find(session, "order", request_key)
                     if existing and existing.resource_id:
-                        existing_order = session.get(Order, existing.resource_id)
-                        # Fetch order items
-                        from sqlalchemy import select
-                        items_query = session.execute(
-                            select(order_items).where(order_items.c.order_id == existing_order.id)
-                        ).fetchall()
-                        # Convert to dict
-                        result = {
-                            "id": existing_order.id,
-                            "report": existing_order.report,
-                            "items": [
-                                {"item_id": row.item_id, "quantity": row.quantity}
-                                for row in items_query
-                            ]
-                        }
-                        return result, False
+                        return OrderService._replay(session, existing), False
                 # If not idempotency-related, re-raise
                 raise ie
 
         except SQLAlchemyError:
             session.rollback()
             raise
-        finally:
-            session.close()
+
+    @staticmethod
+    def _serialize(result: Dict) -> bytes:
+        from app.schemas.order import OrderRead
+        return OrderRead.model_validate(result).model_dump_json().encode()
+
+    @staticmethod
+    def _replay(session, key) -> bytes:
+        """
+        Response body for an order created under an idempotency key, kept in
+        the front cache for the rest of the key's lifetime.
+        """
+        if key.response_body is not None:
+            body = key.response_body.encode()
+        else:
+            # Key stored without its response: rebuild it from the order
+            from app.models.order import Order, order_items
+            from sqlalchemy import select
+            existing_order = session.get(Order, key.resource_id)
+            items_query = session.execute(
+                select(order_items).where(order_items.c.order_id == existing_order.id)
+            ).fetchall()
+            body = OrderService._serialize({
+                "id": existing_order.id,
+                "report": existing_order.report,
+                "items": [
+                    {"item_id": row.item_id, "quantity": row.quantity}
+                    for row in items_query
+                ],
+                "created_at": existing_order.created_at
+            })
+        idempotency_cache.set(
+            (key.resource_type, key.request_key), body, ttl=IdempotencyService.remaining_ttl(key)
+        )
+        return body
+
+    @staticmethod
+    def _merge_lines(items_payload: List[Dict]) -> Dict[int, int]:
+        """
+        Collapse the payload into item_id -> quantity, summing repeated ids
+        (order_items is keyed by (order_id, item_id)). Keeps payload order.
+        """
+        lines: Dict[int, int] = {}
+        for it in items_payload:
+            item_id = it.get("item_id")
+            lines[item_id] = lines.get(item_id, 0) + it.get("quantity", 1)
+        return lines
+
+    @staticmethod
+    def _ensure_items_exist(session, item_ids: List[int]) -> None:
+        """
+        Resolve all item ids with IN queries; raises ValueError listing every
+        missing id at once.
+        """
+        from app.models.item import Item
+        from sqlalchemy import select
+
+        found = set()
+        for start in range(0, len(item_ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = item_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+            found.update(session.scalars(select(Item.id).where(Item.id.in_(chunk))))
+        missing = [item_id for item_id in item_ids if item_id not in found]
+        if len(missing) == 1:
+            raise ValueError(f"Item {missing[0]} not found")
+        if missing:
+            raise ValueError(f"Items not found: {', '.join(str(item_id) for item_id in missing)}")
+
+    @staticmethod
+    def _reserve_stock(session, lines: Dict[int, int]) -> None:
+        """
+        Decrement stock with a conditional UPDATE per line, sent as one
+        executemany: `SET stock = stock - :q WHERE id = :id AND stock >= :q`.
+
+        The check and the decrement happen in the same statement, so
+        concurrent orders can neither oversell nor lose updates. Raises
+        InsufficientStockError (after rolling back) if any line cannot be
+        served.
+        """
+        from app.models.item import Item
+        from sqlalchemy import bindparam, select
+
+        if not lines:
+            return
+        table = Item.__table__
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("b_id"), table.c.stock >= bindparam("b_qty"))
+            .values(stock=table.c.stock - bindparam("b_qty"))
+        )
+        # Sorted ids keep row lock order stable across concurrent orders
+        params = [{"b_id": item_id, "b_qty": qty} for item_id, qty in sorted(lines.items())]
+
+        if session.get_bind().dialect.supports_sane_multi_rowcount:
+            if session.execute(stmt, params).rowcount == len(params):
+                return
+        elif all(session.execute(stmt, p).rowcount == 1 for p in params):
+            return
+
+        # Failure path only: roll back and read stock to explain which lines failed
+        session.rollback()
+        stock = dict(
+            session.execute(select(Item.id, Item.stock).where(Item.id.in_(list(lines)))).tuples().all()
+        )
+        short = [
+            f"item {item_id} (requested {qty}, available {stock.get(item_id, 0)})"
+            for item_id, qty in lines.items() if stock.get(item_id, 0) < qty
+        ]
+        raise InsufficientStockError(
+            "Insufficient stock for " + (", ".join(short) if short else "one or more items")
+        )
 
     @staticmethod
     def get_order(order_id: int) -> Optional[object]:
@@ -134,34 +240,105 @@ class OrderService:
             session.close()
 
     @staticmethod
-    def list_orders():
+    def _load_order_lines(session, order_ids: List[int]) -> Dict[int, List[Dict]]:
         """
-        List all orders with their items.
+        Fetch the lines of many orders with one query per chunk of ids,
+        grouped by order id.
+        """
+        from app.models.order import order_items
+        from sqlalchemy import select
+
+        lines: Dict[int, List[Dict]] = {order_id: [] for order_id in order_ids}
+        if not order_ids:
+            return lines
+
+        for start in range(0, len(order_ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = order_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+            rows = session.execute(
+                select(order_items.c.order_id, order_items.c.item_id, order_items.c.quantity)
+                .where(order_items.c.order_id.in_(chunk))
+            ).fetchall()
+            for row in rows:
+                lines[row.order_id].append({"item_id": row.item_id, "quantity": row.quantity})
+        return lines
+
+    @staticmethod
+    def iter_orders(batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream every order with its items using a single ordered LEFT JOIN,
+        fetching batch_size rows per round trip and grouping lines as they
+        arrive. The session lives as long as the generator does.
         """
         session = SessionLocal()
         try:
-            from app.models.order import Order, order_items
-            from sqlalchemy import select
-            
-            orders = session.query(Order).all()
-            
-            # Convert to list of dicts while the session is open
-            result = []
-            for order in orders:
-                items_query = session.execute(
-                    select(order_items).where(order_items.c.order_id == order.id)
-                ).fetchall()
-                
-                result.append({
-                    "id": order.id,
-                    "report": order.report,
-                    "items": [
-                        {"item_id": row.item_id, "quantity": row.quantity}
-                        for row in items_query
-                    ],
-                    "created_at": order.created_at
-                })
-            
-            return result
+            current = None
+            for row in session.execute(OrderService._export_statement(batch_size)):
+                if current is None or current["id"] != row.id:
+                    if current is not None:
+                        yield current
+                    current = OrderService._export_order(row)
+                if row.item_id is not None:
+                    current["items"].append({"item_id": row.item_id, "quantity": row.quantity})
+            if current is not None:
+                yield current
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    @staticmethod
+    def _export_statement(batch_size: int):
+        from app.models.order import Order, order_items
+        from sqlalchemy import select
+        return (
+            select(
+                Order.id, Order.report, Order.created_at,
+                order_items.c.item_id, order_items.c.quantity,
+            )
+            .outerjoin(order_items, order_items.c.order_id == Order.id)
+            .order_by(Order.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+    @staticmethod
+    def _export_order(row) -> Dict:
+        # Lines are appended by the caller while consecutive rows share the id
+        return {
+            "id": row.id,
+            "report": row.report,
+            "items": [],
+            "created_at": row.created_at
+        }
+
+    @staticmethod
+    def list_orders(limit: Optional[int] = None, after_id: Optional[int] = None):
+        """
+        List orders with their items, optionally one keyset page at a time.
+
+        Uses two queries regardless of the number of orders: one for the
+        orders and one batched fetch of all their lines.
+        """
+        session = SessionLocal()
+        try:
+            return OrderService._list_orders(session, limit, after_id)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _list_orders(session, limit: Optional[int] = None, after_id: Optional[int] = None):
+        from app.models.order import Order
+
+        query = session.query(Order)
+        if after_id is not None:
+            query = query.filter(Order.id > after_id)
+        orders = query.order_by(Order.id).limit(limit).all()
+        lines = OrderService._load_order_lines(session, [order.id for order in orders])
+
+        # Convert to list of dicts while the session is open
+        return [
+            {
+                "id": order.id,
+                "report": order.report,
+                "items": lines[order.id],
+                "created_at": order.created_at
+            }
+            for order in orders
+        ]
@@ -1,30 +1,87 @@
-import boto3
 import logging
-from typing import Optional, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, BinaryIO, Dict, List, Optional, Tuple
 from botocore.exceptions import ClientError, NoCredentialsError
 from app.core.config import settings
+from app.services.storage import ByteRange, create_backend
+from app.utils.cache import create_cache
+from app.utils.pagination import decode_token_cursor, encode_token_cursor
 
 logger = logging.getLogger(__name__)
 
+# Listing pages by (prefix, limit, cursor). Uploads, deletes and copies made
+# through this service drop the pages of the prefixes they touch.
+listing_cache = create_cache("s3_listings", ttl=settings.S3_LISTING_CACHE_TTL_SECONDS)
+
 class S3Service:
     """
     Service to simulate AWS S3 interaction.
     Demonstrates connection logic and exception handling with boto3.
+
+    The boto3 client is built on first use: importing boto3 and loading the
+    botocore service model takes hundreds of ms, which would otherwise be
+    paid by every worker at import time.
+
+    Real object operations go through a storage backend (STORAGE_BACKEND):
+    S3 through this client, or a local directory.
     """
     
     def __init__(self):
+        self.bucket_name = settings.AWS_S3_BUCKET
+        self._s3_client = None
+        self._executor = None
+        self._client_lock = threading.Lock()
+        self.backend = create_backend(self.bucket_name, lambda: self.s3_client)
+
+    @property
+    def s3_client(self):
+        """
+        Initialize S3 client with configured credentials (once, thread-safe).
+        """
+        if self._s3_client is None:
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._s3_client = self._create_client()
+        return self._s3_client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
         """
-        Initialize S3 client with configured credentials.
+        Bounded pool for batch operations, shared by all requests so the
+        number of S3 calls in flight never exceeds S3_MAX_CONCURRENCY.
         """
+        if self._executor is None:
+            with self._client_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=settings.S3_MAX_CONCURRENCY, thread_name_prefix="s3")
+        return self._executor
+
+    def shutdown(self) -> None:
+        """
+        Stop the batch pool, if started, once its running calls finish.
+        """
+        with self._client_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _create_client(self):
         try:
-            self.s3_client = boto3.client(
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
                 's3',
                 region_name=settings.AWS_REGION,
+                endpoint_url=settings.S3_ENDPOINT_URL,
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                # One pooled connection per pool thread (botocore defaults to 10)
+                config=Config(max_pool_connections=settings.S3_MAX_CONCURRENCY),
             )
-            self.bucket_name = settings.AWS_S3_BUCKET
             logger.info(f"✓ S3 client initialized for bucket: {self.bucket_name}")
+            return client
         except NoCredentialsError:
             logger.error("✗ AWS credentials not found")
             raise
@@ -188,6 +245,168 @@ class S3Service:
             logger.error(f"✗ Error getting bucket info: {str(e)}")
             raise
 
+    # Real object operations (through the storage backend)
+
+    def object_key(self, maintenance_id: int, image_name: str) -> str:
+        """
+        Key of a maintenance image; raises ValueError for invalid names.
+        """
+        if "/" in image_name or "\\" in image_name or image_name.startswith("."):
+            raise ValueError("Invalid image name")
+        self._validate_image_name(image_name)
+        return f"maintenance/{maintenance_id}/{image_name}"
+
+    async def upload_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str = "application/octet-stream",
+                            max_bytes: Optional[int] = None) -> Dict:
+        """
+        Upload a streamed body to key without holding it in memory (S3:
+        multipart upload of S3_MULTIPART_PART_SIZE parts; local: temporary
+        file renamed into place).
+
+        Raises ValueError if the body exceeds max_bytes.
+        """
+        stored = await self.backend.put_stream(key, chunks, content_type, max_bytes)
+        self.invalidate_listings(key)
+        logger.info(f"📤 Uploaded {self.backend.name}://{self.bucket_name}/{key} ({stored['size']} bytes, {stored['parts']} parts)")
+        return {"status": "success", "bucket": self.bucket_name, "object_key": key, **stored}
+
+    def open_object(self, key: str, byte_range: Optional[ByteRange] = None, if_none_match: Optional[str] = None) -> Dict:
+        """
+        Start reading an object, or the byte_range of it: returns its
+        metadata and a chunk iterator (body) or, for a whole local file, its
+        path.
+
+        Raises FileNotFoundError if the key does not exist,
+        RangeNotSatisfiable if the range starts past its end and
+        NotModified if if_none_match is its current ETag.
+        """
+        return self.backend.get(key, byte_range, if_none_match)
+
+    def presigned_url(self, method: str, key: str, expires_in: Optional[int] = None,
+                      content_type: Optional[str] = None) -> Dict:
+        """
+        Presigned URL so clients PUT/GET the object directly against S3,
+        without the bytes passing through the API. Raises
+        UnsupportedOperation on the local backend.
+        """
+        expires_in = expires_in or settings.S3_PRESIGNED_EXPIRES_SECONDS
+        signed = self.backend.presigned_url(method, key, expires_in, content_type)
+        return {
+            **signed,
+            "method": method,
+            "bucket": self.bucket_name,
+            "object_key": key,
+            "expires_in": expires_in,
+        }
+
+    def list_images(self, maintenance_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+        """
+        One page of the images under maintenance/{maintenance_id}/.
+
+        The backend's page token (the last key of the page) travels
+        in the opaque next_cursor. Pages are cached for
+        S3_LISTING_CACHE_TTL_SECONDS. Raises ValueError for a bad cursor.
+        """
+        prefix = f"maintenance/{maintenance_id}/"
+        limit = limit or settings.S3_LISTING_PAGE_SIZE
+        token = decode_token_cursor(cursor) if cursor else None
+        return listing_cache.get_or_load((prefix, limit, cursor), lambda: self._list_page(prefix, limit, token))
+
+    def _list_page(self, prefix: str, limit: int, token: Optional[str]) -> Dict:
+        images, next_token = self.backend.list_page(prefix, limit, token)
+        logger.info(f"📋 Listed {self.backend.name}://{self.bucket_name}/{prefix}: {len(images)} images")
+        return {
+            "status": "success",
+            "bucket": self.bucket_name,
+            "prefix": prefix,
+            "total_images": len(images),
+            "images": images,
+            "next_cursor": encode_token_cursor(next_token) if next_token else None,
+        }
+
+    @staticmethod
+    def invalidate_listings(*keys: str) -> None:
+        """
+        Drop cached listing pages of the maintenance prefixes of keys.
+        """
+        prefixes = {"/".join(key.split("/")[:2]) + "/" for key in keys}
+        if prefixes:
+            listing_cache.invalidate_where(lambda cache_key: cache_key[0] in prefixes)
+
+    # Batch operations, run on the bounded executor
+
+    def upload_many(self, maintenance_id: int, files: List[Tuple[str, BinaryIO, str]]) -> List[Dict]:
+        """
+        Upload (image_name, file object, content type) triples concurrently.
+        Returns one result per file, in order; invalid names and files larger
+        than S3_MAX_UPLOAD_BYTES are reported without being uploaded.
+        """
+        def upload(entry: Tuple[str, BinaryIO, str]) -> Dict:
+            image_name, fileobj, content_type = entry
+            result = {"image_name": image_name, "object_key": None}
+            try:
+                result["object_key"] = key = self.object_key(maintenance_id, image_name)
+                size = fileobj.seek(0, 2)
+                fileobj.seek(0)
+                if size > settings.S3_MAX_UPLOAD_BYTES:
+                    raise ValueError(f"File exceeds the maximum size of {settings.S3_MAX_UPLOAD_BYTES} bytes")
+                self.backend.put(key, fileobj, content_type)
+            except Exception as e:
+                return {**result, "status": "error", "error": str(e)}
+            return {**result, "status": "uploaded"}
+
+        results = list(self.executor.map(upload, files))
+        self.invalidate_listings(*(r["object_key"] for r in results if r["status"] == "uploaded"))
+        logger.info(f"📤 Batch upload to maintenance/{maintenance_id}/: {self._summary(results)}")
+        return results
+
+    def delete_many(self, keys: List[str]) -> List[Dict]:
+        """
+        Delete keys 1000 (the S3 delete_objects maximum) per backend call,
+        chunks sent concurrently. One result per key, in order.
+        """
+        chunks = [keys[start:start + 1000] for start in range(0, len(keys), 1000)]
+        results = [result for chunk in self.executor.map(self.backend.delete, chunks) for result in chunk]
+        self.invalidate_listings(*keys)
+        logger.info(f"🗑️  Batch delete: {self._summary(results)}")
+        return results
+
+    def copy_prefix(self, source_prefix: str, target_prefix: str, move: bool = False) -> List[Dict]:
+        """
+        Copy every object under source_prefix to target_prefix concurrently
+        (server-side copy_object on S3, no bytes through the API). With
+        move, the sources that were copied are then deleted in batches.
+        """
+        source_keys = self.backend.list_keys(source_prefix)
+
+        def copy(source_key: str) -> Dict:
+            key = target_prefix + source_key[len(source_prefix):]
+            try:
+                self.backend.copy(source_key, key)
+            except Exception as e:
+                return {"source_key": source_key, "object_key": key, "status": "error", "error": str(e)}
+            return {"source_key": source_key, "object_key": key, "status": "copied"}
+
+        results = list(self.executor.map(copy, source_keys))
+        self.invalidate_listings(*(r["object_key"] for r in results if r["status"] == "copied"))
+        if move:
+            copied = [r["source_key"] for r in results if r["status"] == "copied"]
+            deleted = {r["object_key"]: r for r in self.delete_many(copied)}
+            for result in results:
+                if result["status"] == "copied":
+                    outcome = deleted[result["source_key"]]
+                    if outcome["status"] == "deleted":
+                        result["status"] = "moved"
+                    else:
+                        result["error"] = f"Copied but source not deleted: {outcome['error']}"
+        logger.info(f"📋 Batch {'move' if move else 'copy'} {source_prefix} -> {target_prefix}: {self._summary(results)}")
+        return results
+
+    @staticmethod
+    def _summary(results: List[Dict]) -> str:
+        failed = sum(1 for r in results if r["status"] == "error")
+        return f"{len(results) - failed} ok, {failed} failed"
+
     # Private helpers for simulation
 
     def _verify_bucket_exists(self) -> bool:
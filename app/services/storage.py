@@ -0,0 +1,500 @@
+import abc
+import asyncio
+import logging
+import mimetypes
+import mmap
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (first, last) byte positions, inclusive; (None, n) means the last n bytes
+ByteRange = Tuple[Optional[int], Optional[int]]
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """
+    The requested range starts past the end of the object (HTTP 416).
+    """
+
+
+class NotModified(Exception):
+    """
+    The object still has the ETag the client sent in If-None-Match (HTTP 304).
+    """
+
+    def __init__(self, etag: str):
+        super().__init__(etag)
+        self.etag = etag
+
+
+class UnsupportedOperation(Exception):
+    """
+    The operation has no equivalent in this backend (HTTP 501).
+    """
+
+
+def parse_range_header(value: Optional[str]) -> Optional[ByteRange]:
+    """
+    Parse a single-range Range header. Returns None when there is none or
+    it is not a single byte range (the whole object is then served, as S3
+    does).
+    """
+    match = _RANGE.match(value.strip()) if value else None
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = (int(g) if g else None for g in match.groups())
+    if first is not None and last is not None and last < first:
+        return None
+    return first, last
+
+
+def resolve_range(byte_range: ByteRange, size: int) -> Tuple[int, int]:
+    """
+    Absolute (first, last) of byte_range in an object of size bytes.
+    """
+    first, last = byte_range
+    if first is None:
+        if last == 0 or size == 0:
+            raise RangeNotSatisfiable(f"bytes */{size}")
+        return max(size - last, 0), size - 1
+    if first >= size:
+        raise RangeNotSatisfiable(f"bytes */{size}")
+    return first, size - 1 if last is None else min(last, size - 1)
+
+
+def format_range(byte_range: ByteRange) -> str:
+    first, last = byte_range
+    return f"bytes={'' if first is None else first}-{'' if last is None else last}"
+
+
+class StorageBackend(abc.ABC):
+    """
+    Object operations S3Service runs against. Keys are "/"-separated paths
+    (maintenance/{id}/{name}); every backend must behave the same:
+
+    - put/put_stream replace the object atomically.
+    - get raises FileNotFoundError for a missing key,
+      RangeNotSatisfiable for a range past the end and NotModified when
+      if_none_match is the current ETag (nothing is opened then).
+    - list_page returns the objects directly under prefix (not those in
+      "subdirectories" such as thumbs/) in lexicographic order.
+    - delete reports a missing key as deleted (S3 semantics).
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str,
+                         max_bytes: Optional[int]) -> Dict:
+        """
+        Store a streamed body; returns {"size", "etag", "parts"}. Raises
+        ValueError if the body exceeds max_bytes.
+        """
+
+    @abc.abstractmethod
+    def put(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def get(self, key: str, byte_range: Optional[ByteRange] = None, if_none_match: Optional[str] = None) -> Dict:
+        """
+        Open an object (or a range of it). Returns content_type,
+        content_length, etag (quoted), content_range (None for the whole
+        object) and either body (chunk iterator) or path (a local file
+        served whole).
+        """
+
+    @abc.abstractmethod
+    def list_page(self, prefix: str, limit: int, token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Up to limit objects under prefix after token, and the token of the
+        next page (None on the last one).
+        """
+
+    @abc.abstractmethod
+    def list_keys(self, prefix: str) -> List[str]:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, keys: List[str]) -> List[Dict]:
+        """
+        Delete up to 1000 keys; one {"object_key", "status"} per key.
+        """
+
+    @abc.abstractmethod
+    def copy(self, source_key: str, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def presigned_url(self, method: str, key: str, expires_in: int, content_type: Optional[str]) -> Dict:
+        """
+        {"url", "headers"} to run method on key directly against the
+        backend. Raises UnsupportedOperation if it cannot sign URLs.
+        """
+
+
+class S3Backend(StorageBackend):
+    """
+    S3 (or an S3-compatible endpoint) through the client returned by
+    client(), built lazily by S3Service.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket_name: str, client: Callable[[], Any]):
+        self.bucket_name = bucket_name
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client()
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str,
+                         max_bytes: Optional[int]) -> Dict:
+        """
+        Chunks are gathered into parts of S3_MULTIPART_PART_SIZE bytes and
+        each full part is sent with upload_part (in a worker thread, boto3
+        is blocking), so memory stays at one part. A body smaller than one
+        part is sent with a single put_object. The multipart upload is
+        aborted on any error, leaving no orphan parts.
+        """
+        part_size = max(settings.S3_MULTIPART_PART_SIZE, 5 * 1024 * 1024)
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError(f"Upload exceeds {max_bytes} bytes")
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    if upload_id is None:
+                        upload_id = (await asyncio.to_thread(
+                            self.client.create_multipart_upload,
+                            Bucket=self.bucket_name, Key=key, ContentType=content_type,
+                        ))["UploadId"]
+                    part, buffer = bytes(buffer[:part_size]), buffer[part_size:]
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, part))
+
+            if upload_id is None:
+                response = await asyncio.to_thread(
+                    self.client.put_object,
+                    Bucket=self.bucket_name, Key=key, Body=bytes(buffer), ContentType=content_type,
+                )
+            else:
+                if buffer:
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+                response = await asyncio.to_thread(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    await asyncio.to_thread(
+                        self.client.abort_multipart_upload, Bucket=self.bucket_name, Key=key, UploadId=upload_id
+                    )
+                except Exception as e:
+                    logger.error(f"✗ Could not abort multipart upload {upload_id}: {str(e)}")
+            raise
+        return {"size": size, "etag": response["ETag"].strip('"'), "parts": len(parts) or 1}
+
+    async def _upload_part(self, key: str, upload_id: str, number: int, body: bytes) -> Dict:
+        response = await asyncio.to_thread(
+            self.client.upload_part,
+            Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=number, Body=body,
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def put(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        self.client.put_object(Bucket=self.bucket_name, Key=key, Body=fileobj, ContentType=content_type)
+
+    def get(self, key: str, byte_range: Optional[ByteRange] = None, if_none_match: Optional[str] = None) -> Dict:
+        params = {"Bucket": self.bucket_name, "Key": key}
+        if byte_range is not None:
+            params["Range"] = format_range(byte_range)
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        try:
+            response = self.client.get_object(**params)
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key)
+            if code == "304":
+                raise NotModified(if_none_match)
+            if code == "InvalidRange":
+                raise RangeNotSatisfiable(str(e))
+            raise
+        return {
+            "content_type": response.get("ContentType", "application/octet-stream"),
+            "content_length": response["ContentLength"],
+            "etag": response["ETag"],
+            "content_range": response.get("ContentRange") if byte_range is not None else None,
+            "body": self._iter_body(response["Body"]),
+        }
+
+    @staticmethod
+    def _iter_body(body) -> Iterator[bytes]:
+        try:
+            yield from body.iter_chunks(settings.S3_DOWNLOAD_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def list_page(self, prefix: str, limit: int, token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """
+        As on LocalBackend, the token is the last key of the previous page
+        (StartAfter). "Subdirectories" come back as CommonPrefixes, which
+        take MaxKeys slots too, so list_objects_v2 is called until limit + 1
+        objects (one to know there is a next page) or the end of the listing.
+        """
+        params = {"Bucket": self.bucket_name, "Prefix": prefix, "Delimiter": "/"}
+        if token:
+            params["StartAfter"] = token
+        objects = []
+        while True:
+            response = self.client.list_objects_v2(**params, MaxKeys=limit + 1 - len(objects))
+            objects += [
+                {
+                    "object_key": obj["Key"],
+                    "size": obj["Size"],
+                    "last_modified": obj["LastModified"].isoformat(),
+                    "etag": obj["ETag"].strip('"'),
+                }
+                for obj in response.get("Contents", [])
+            ]
+            if len(objects) > limit or not response.get("IsTruncated"):
+                break
+            params["ContinuationToken"] = response["NextContinuationToken"]
+        if len(objects) > limit:
+            return objects[:limit], objects[limit - 1]["object_key"]
+        return objects, None
+
+    def list_keys(self, prefix: str) -> List[str]:
+        return [
+            obj["Key"]
+            for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket_name, Prefix=prefix)
+            for obj in page.get("Contents", [])
+        ]
+
+    def delete(self, keys: List[str]) -> List[Dict]:
+        try:
+            response = self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except Exception as e:
+            return [{"object_key": key, "status": "error", "error": str(e)} for key in keys]
+        # Quiet mode only reports failures
+        errors = {error["Key"]: error.get("Message", error.get("Code")) for error in response.get("Errors", [])}
+        return [
+            {"object_key": key, "status": "error", "error": errors[key]} if key in errors
+            else {"object_key": key, "status": "deleted"}
+            for key in keys
+        ]
+
+    def copy(self, source_key: str, key: str) -> None:
+        self.client.copy_object(Bucket=self.bucket_name, Key=key, CopySource={"Bucket": self.bucket_name, "Key": source_key})
+
+    def presigned_url(self, method: str, key: str, expires_in: int, content_type: Optional[str]) -> Dict:
+        params = {"Bucket": self.bucket_name, "Key": key}
+        headers = {}
+        if method == "PUT":
+            client_method = "put_object"
+            if content_type:
+                # Signed: the client must send the same Content-Type
+                params["ContentType"] = content_type
+                headers["Content-Type"] = content_type
+        else:
+            client_method = "get_object"
+        url = self.client.generate_presigned_url(client_method, Params=params, ExpiresIn=expires_in)
+        return {"url": url, "headers": headers}
+
+
+class LocalBackend(StorageBackend):
+    """
+    Objects as files under root (offline development and tests). Whole
+    files are served by path (FileResponse, sendfile where the server
+    supports it) and ranges are sliced from a memory map.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        parts = key.split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Invalid object key: {key}")
+        return os.path.join(self.root, *parts)
+
+    def _temp_path(self, path: str) -> str:
+        # Dot-prefixed: never listed (object names cannot start with a dot)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.part")
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str,
+                         max_bytes: Optional[int]) -> Dict:
+        """
+        Written to a temporary file in the target directory (in worker
+        threads, S3_DOWNLOAD_CHUNK_SIZE bytes at a time) and renamed into
+        place once complete.
+        """
+        path = self._path(key)
+        temp = await asyncio.to_thread(self._temp_path, path)
+        buffer = bytearray()
+        size = 0
+        try:
+            with open(temp, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise ValueError(f"Upload exceeds {max_bytes} bytes")
+                    buffer += chunk
+                    if len(buffer) >= settings.S3_DOWNLOAD_CHUNK_SIZE:
+                        await asyncio.to_thread(f.write, bytes(buffer))
+                        buffer.clear()
+                await asyncio.to_thread(f.write, bytes(buffer))
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        return {"size": size, "etag": self._etag(os.stat(path)), "parts": 1}
+
+    def put(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        path = self._path(key)
+        temp = self._temp_path(path)
+        try:
+            with open(temp, "wb") as f:
+                shutil.copyfileobj(fileobj, f, settings.S3_DOWNLOAD_CHUNK_SIZE)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    def get(self, key: str, byte_range: Optional[ByteRange] = None, if_none_match: Optional[str] = None) -> Dict:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(key)
+        stat = os.stat(path)
+        etag = f'"{self._etag(stat)}"'
+        if if_none_match and etag in if_none_match:
+            raise NotModified(etag)
+        result = {
+            "content_type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "content_length": stat.st_size,
+            "etag": etag,
+            "content_range": None,
+        }
+        if byte_range is None:
+            return {**result, "path": path, "stat": stat}
+        first, last = resolve_range(byte_range, stat.st_size)
+        f = open(path, "rb")
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            f.close()
+            raise
+        return {
+            **result,
+            "content_length": last - first + 1,
+            "content_range": f"bytes {first}-{last}/{stat.st_size}",
+            "body": self._iter_mapped(f, mapped, first, last + 1),
+        }
+
+    @staticmethod
+    def _iter_mapped(f: BinaryIO, mapped: mmap.mmap, start: int, end: int) -> Iterator[bytes]:
+        try:
+            for offset in range(start, end, settings.S3_DOWNLOAD_CHUNK_SIZE):
+                yield mapped[offset:min(offset + settings.S3_DOWNLOAD_CHUNK_SIZE, end)]
+        finally:
+            mapped.close()
+            f.close()
+
+    def _walk(self, prefix: str) -> List[str]:
+        directory = self._path(prefix.rstrip("/")) if prefix.strip("/") else self.root
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            relative = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            keys.extend(f"{relative}/{name}" for name in filenames if not name.startswith("."))
+        return sorted(key for key in keys if key.startswith(prefix))
+
+    def list_page(self, prefix: str, limit: int, token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        # The token is the last key of the previous page
+        try:
+            with os.scandir(self._path(prefix.rstrip("/"))) as entries:
+                names = [entry.name for entry in entries if entry.is_file() and not entry.name.startswith(".")]
+        except FileNotFoundError:
+            names = []
+        keys = sorted(key for key in (prefix + name for name in names) if token is None or key > token)
+        objects = []
+        for key in keys[:limit]:
+            try:
+                stat = os.stat(self._path(key))
+            except FileNotFoundError:
+                continue
+            objects.append({
+                "object_key": key,
+                "size": stat.st_size,
+                "last_modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+                "etag": self._etag(stat),
+            })
+        return objects, keys[limit - 1] if len(keys) > limit else None
+
+    def list_keys(self, prefix: str) -> List[str]:
+        return self._walk(prefix)
+
+    def delete(self, keys: List[str]) -> List[Dict]:
+        results = []
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                results.append({"object_key": key, "status": "error", "error": str(e)})
+                continue
+            results.append({"object_key": key, "status": "deleted"})
+        return results
+
+    def copy(self, source_key: str, key: str) -> None:
+        path = self._path(key)
+        temp = self._temp_path(path)
+        try:
+            shutil.copyfile(self._path(source_key), temp)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    def presigned_url(self, method: str, key: str, expires_in: int, content_type: Optional[str]) -> Dict:
+        raise UnsupportedOperation(f"Presigned URLs are not supported by the {self.name} backend")
+
+
+
+def create_backend(bucket_name: str, client: Callable[[], Any]) -> StorageBackend:
+    """
+    Backend selected by STORAGE_BACKEND.
+    """
+    if settings.STORAGE_BACKEND == "local":
+        return LocalBackend(settings.LOCAL_STORAGE_DIR)
+    return S3Backend(bucket_name, client)
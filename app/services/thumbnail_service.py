@@ -0,0 +1,160 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from typing import IO, BinaryIO, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.s3_service import s3_service
+from app.utils.images import render_thumbnails
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailService:
+    """
+    Derivatives of maintenance images (THUMBNAIL_SIZES, longest edge in
+    px), stored next to them under maintenance/{id}/thumbs/{size}/.
+
+    Resizing is CPU bound, so it runs in a process pool of
+    THUMBNAIL_WORKERS processes (default: the cores shared among the
+    SERVER_WORKERS server processes); the event loop only awaits the
+    result. The pool is started on first use and stopped by shutdown().
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def pool_size() -> int:
+        if settings.THUMBNAIL_WORKERS:
+            return settings.THUMBNAIL_WORKERS
+        return max(1, (os.cpu_count() or 1) // (settings.SERVER_WORKERS or 1))
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a process that runs server threads is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.pool_size(),
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """
+        Stop the pool processes, if started (blocks until they exit).
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def thumbnail_key(maintenance_id: int, size: int, image_name: str) -> str:
+        return f"maintenance/{maintenance_id}/thumbs/{size}/{image_name}"
+
+    def thumbnail_keys(self, maintenance_id: int, image_name: str) -> List[str]:
+        return [self.thumbnail_key(maintenance_id, size, image_name) for size in settings.THUMBNAIL_SIZES]
+
+    async def generate(self, maintenance_id: int, image_name: str, source_path: str, content_type: str) -> Dict[int, str]:
+        """
+        Render and store the derivatives of the image in the local file
+        source_path (left for the caller to remove). Returns {size: key};
+        empty (and logged) if thumbnails are disabled or cannot be rendered
+        or stored, which never fails the upload of the original.
+        """
+        if not settings.THUMBNAILS_ENABLED or not settings.THUMBNAIL_SIZES:
+            return {}
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(
+                self.executor, render_thumbnails, source_path, settings.THUMBNAIL_SIZES, settings.THUMBNAIL_QUALITY
+            )
+        except ValueError as e:
+            logger.warning(f"⚠️  No thumbnails for maintenance/{maintenance_id}/{image_name}: {str(e)}")
+            return {}
+        except Exception as e:
+            logger.error(f"✗ Thumbnail rendering failed for maintenance/{maintenance_id}/{image_name}: {str(e)}")
+            return {}
+
+        def store(item: Tuple[int, bytes]) -> str:
+            size, body = item
+            key = self.thumbnail_key(maintenance_id, size, image_name)
+            s3_service.backend.put(key, io.BytesIO(body), content_type)
+            return key
+
+        try:
+            keys = await asyncio.gather(*(asyncio.to_thread(store, item) for item in rendered.items()))
+        except Exception as e:
+            logger.error(f"✗ Could not store thumbnails of maintenance/{maintenance_id}/{image_name}: {str(e)}")
+            return {}
+        finally:
+            s3_service.invalidate_listings(*self.thumbnail_keys(maintenance_id, image_name))
+        logger.info(f"🖼️  {len(keys)} thumbnails for maintenance/{maintenance_id}/{image_name}")
+        return dict(zip(rendered, keys))
+
+    async def generate_many(self, maintenance_id: int, files: List[Tuple[str, BinaryIO, str]]) -> List[Dict[int, str]]:
+        """
+        generate() for already uploaded files, each copied to a temporary
+        file first; at most one such copy per pool worker at a time.
+        """
+        if not settings.THUMBNAILS_ENABLED or not settings.THUMBNAIL_SIZES:
+            return [{} for _ in files]
+        limit = asyncio.Semaphore(self.pool_size())
+
+        async def one(entry: Tuple[str, BinaryIO, str]) -> Dict[int, str]:
+            image_name, fileobj, content_type = entry
+            async with limit:
+                source = await asyncio.to_thread(copy_source, fileobj)
+                if source is None:
+                    return {}
+                try:
+                    return await self.generate(maintenance_id, image_name, source.name, content_type)
+                finally:
+                    remove_source(source)
+
+        return await asyncio.gather(*(one(entry) for entry in files))
+
+
+def open_source() -> IO[bytes]:
+    """
+    Temporary file for a thumbnail source; remove it with remove_source().
+    """
+    return tempfile.NamedTemporaryFile(prefix="thumbnail-source-", delete=False)
+
+
+def remove_source(source: IO[bytes]) -> None:
+    source.close()
+    with suppress(FileNotFoundError):
+        os.remove(source.name)
+
+
+def copy_source(fileobj: BinaryIO) -> Optional[IO[bytes]]:
+    """
+    The file copied to a closed temporary file, or None when it exceeds
+    THUMBNAIL_MAX_SOURCE_BYTES.
+    """
+    if fileobj.seek(0, 2) > settings.THUMBNAIL_MAX_SOURCE_BYTES:
+        return None
+    fileobj.seek(0)
+    source = open_source()
+    try:
+        shutil.copyfileobj(fileobj, source)
+        source.close()
+    except BaseException:
+        remove_source(source)
+        raise
+    return source
+
+
+# Instancia singleton
+thumbnail_service = ThumbnailService()
@@ -0,0 +1,80 @@
+import logging
+from typing import Dict, Optional, Tuple
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class VersionService:
+    """
+    Per-table change counters (table_versions) used to build ETags.
+    """
+
+    @staticmethod
+    def bump(session, *tables: str) -> None:
+        """
+        Increment the counters of tables in a short transaction of their
+        own; call it right after the write commits.
+
+        Inside the write transaction, every concurrent writer would queue on
+        the same table_versions row lock until commit (PostgreSQL),
+        serializing e.g. concurrent order creation. Between the two commits
+        a polling client may still get a 304 for the previous version. A
+        failed bump is logged, not raised: the write is already committed.
+        """
+        try:
+            VersionService._apply_bumps(session, tables)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"✗ Could not bump table versions {list(tables)}: {str(e)}")
+
+    @staticmethod
+    def _apply_bumps(session, tables) -> None:
+        from app.models.table_version import TableVersion
+
+        table = TableVersion.__table__
+        dialect = session.get_bind().dialect.name
+        for name in tables:
+            if dialect in ("sqlite", "postgresql"):
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                stmt = insert(table).values(name=name, version=1)
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=[table.c.name],
+                    set_={"version": table.c.version + 1},
+                ))
+                continue
+            updated = session.execute(
+                table.update().where(table.c.name == name).values(version=table.c.version + 1)
+            ).rowcount
+            if not updated:
+                session.execute(table.insert().values(name=name, version=1))
+
+    @staticmethod
+    def get_versions(*tables: str) -> Dict[str, int]:
+        session = SessionLocal()
+        try:
+            return VersionService._get_versions(session, *tables)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _get_versions(session, *tables: str) -> Dict[str, int]:
+        from sqlalchemy import select
+        from app.models.table_version import TableVersion
+
+        rows = session.execute(
+            select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+        ).tuples().all()
+        versions = {name: 0 for name in tables}
+        versions.update(rows)
+        return versions
+
+
+def version_key(versions: Optional[Dict[str, int]]) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """
+    Hashable form of get_versions() for cache keys.
+    """
+    return None if versions is None else tuple(sorted(versions.items()))
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.core.config import settings
+
+# Returned by TTLCache.get on a miss (None is a valid cached value)
+MISSING = object()
+
+# Caches built by create_cache, by name, for stats and test resets
+CACHES: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with LRU eviction, a per-entry TTL and
+    hit/miss counters.
+
+    Writers call invalidate(), which also bumps a generation number: a value
+    loaded before the invalidation is discarded by set() instead of
+    re-populating the cache with stale data.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, enabled: bool = True, max_rows: Optional[int] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Lists longer than this are returned but not stored (bounds memory)
+        self.max_rows = max_rows
+        self.enabled = enabled and maxsize > 0 and ttl > 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        if not self.enabled:
+            return MISSING
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """
+        Store value; pass the generation read before loading it so a
+        concurrent invalidation wins. ttl shortens the entry's lifetime
+        (it is capped at the cache's own TTL).
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _storable(self, value: Any) -> bool:
+        return self.max_rows is None or not isinstance(value, list) or len(value) <= self.max_rows
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader() on a miss.
+        """
+        value = self.get(key)
+        if value is MISSING:
+            generation = self.generation
+            value = loader()
+            if self._storable(value):
+                self.set(key, value, generation)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        get_or_load for coroutine loaders (async services).
+        """
+        value = self.get(key)
+        if value is MISSING:
+            generation = self.generation
+            value = await loader()
+            if self._storable(value):
+                self.set(key, value, generation)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Drop the entries whose key matches predicate. Bumps the generation
+        like invalidate(), so no load that started earlier is stored.
+        """
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+            self.generation += 1
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "max_rows": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def create_cache(name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None) -> TTLCache:
+    """
+    Cache sized from Settings (CACHE_ENABLED, CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS, CACHE_MAX_ROWS); maxsize/ttl override the defaults.
+    """
+    cache = TTLCache(
+        name,
+        settings.CACHE_MAX_ENTRIES if maxsize is None else maxsize,
+        settings.CACHE_TTL_SECONDS if ttl is None else ttl,
+        enabled=settings.CACHE_ENABLED,
+        max_rows=settings.CACHE_MAX_ROWS,
+    )
+    CACHES[name] = cache
+    return cache
+
+
+def clear_all_caches() -> None:
+    for cache in CACHES.values():
+        cache.invalidate()
+        cache.reset_stats()
@@ -2,7 +2,12 @@ import time
 import functools
 import logging
 import asyncio
-from typing import Callable, Any
+import random
+from typing import AsyncIterator, Callable, Any
+from fastapi import HTTPException
+from starlette.responses import StreamingResponse
+from app.core.config import settings
+from app.utils.metrics import registry
 
 # Logger with INFO level visible in console
 logging.basicConfig(level=logging.INFO)
@@ -10,26 +15,86 @@ logger = logging.getLogger(__name__)
 
 def measure_time(func: Callable[..., Any]) -> Callable[..., Any]:
     """
-    Decorator that measures and logs function execution time.
+    Decorator that measures function execution time.
     Supports sync and async functions (async def).
+
+    Each call is recorded in the metrics registry (served at /metrics) and
+    logged for a METRICS_LOG_SAMPLE_RATE fraction of calls. With metrics
+    disabled and a zero sample rate the function is returned unwrapped.
+
+    Only unhandled exceptions and 5xx responses count as errors; expected
+    4xx answers (404, 409, 400 for a bad cursor...) do not.
+
+    For a StreamingResponse (NDJSON exports, image downloads) the clock
+    stops when its body has been sent, not when the response is built.
     """
+    record = settings.METRICS_ENABLED
+    sample_rate = settings.METRICS_LOG_SAMPLE_RATE
+    if not record and sample_rate <= 0:
+        return func
+    endpoint = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    def finish(start: float, error: bool) -> None:
+        elapsed = time.perf_counter() - start
+        if record:
+            registry.observe(endpoint, elapsed, error)
+        if sample_rate >= 1 or (sample_rate > 0 and random.random() < sample_rate):
+            logger.info("✓ %s executed in %.2f ms", func.__name__, elapsed * 1000.0)
+
+    def is_error(exc: BaseException) -> bool:
+        return not isinstance(exc, HTTPException) or exc.status_code >= 500
+
+    async def timed_body(body: AsyncIterator, start: float) -> AsyncIterator:
+        error = True
+        try:
+            async for chunk in body:
+                yield chunk
+            error = False
+        finally:
+            finish(start, error)
+
+    def deferred(result: Any, start: float) -> bool:
+        """
+        Hand the timing of a streamed body over to the body itself.
+        """
+        if not isinstance(result, StreamingResponse):
+            return False
+        result.body_iterator = timed_body(result.body_iterator, start)
+        return True
+
     if asyncio.iscoroutinefunction(func):
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             start = time.perf_counter()
+            error = False
+            streamed = False
             try:
-                return await func(*args, **kwargs)
+                result = await func(*args, **kwargs)
+                error = getattr(result, "status_code", 200) >= 500
+                streamed = deferred(result, start)
+                return result
+            except BaseException as exc:
+                error = is_error(exc)
+                raise
             finally:
-                elapsed_ms = (time.perf_counter() - start) * 1000.0
-                logger.info(f"✓ {func.__name__} executed in {elapsed_ms:.2f} ms")
+                if not streamed:
+                    finish(start, error)
         return async_wrapper
     else:
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
             start = time.perf_counter()
+            error = False
+            streamed = False
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
+                error = getattr(result, "status_code", 200) >= 500
+                streamed = deferred(result, start)
+                return result
+            except BaseException as exc:
+                error = is_error(exc)
+                raise
             finally:
-                elapsed_ms = (time.perf_counter() - start) * 1000.0
-                logger.info(f"✓ {func.__name__} executed in {elapsed_ms:.2f} ms")
-        return sync_wrapper
\ No newline at end of file
+                if not streamed:
+                    finish(start, error)
+        return sync_wrapper
@@ -0,0 +1,38 @@
+import hashlib
+from typing import Dict, Optional
+from fastapi import Request, Response, status
+
+
+def make_etag(versions: Dict[str, int], request: Request) -> str:
+    """
+    Weak ETag for a list response: the table versions it depends on plus the
+    query string (each page / filter has its own tag).
+    """
+    raw = ",".join(f"{name}={versions[name]}" for name in sorted(versions)) + "?" + request.url.query
+    return 'W/"' + hashlib.blake2b(raw.encode(), digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are equivalent for GET
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def conditional_get(request: Request, response: Response, versions: Dict[str, int]) -> Optional[Response]:
+    """
+    Return a 304 response when the client's If-None-Match matches, otherwise
+    set ETag on response and return None.
+
+    Versions must be read before the rows: a write landing in between then
+    yields new rows with the old tag (one extra download), never a stale 304.
+    """
+    etag = make_etag(versions, request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
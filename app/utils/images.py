@@ -0,0 +1,49 @@
+import io
+from typing import Dict, Iterable
+
+# Formats a derivative can be saved in, and the modes each accepts as is
+_SAVE_MODES = {
+    "JPEG": ("RGB", "L", "CMYK"),
+    "PNG": ("RGB", "RGBA", "L", "LA", "P", "1"),
+    "WEBP": ("RGB", "RGBA"),
+    "GIF": ("P", "L"),
+}
+
+
+def render_thumbnails(path: str, sizes: Iterable[int], quality: int) -> Dict[int, bytes]:
+    """
+    Resize the encoded image at path so its longest edge is at most each of
+    sizes (never enlarged), keeping the source format. Returns {size: bytes}.
+
+    Runs in the thumbnail process pool: the source is read from disk there,
+    never pickled across, and this module only imports Pillow so spawning a
+    worker stays cheap. Raises ValueError for files Pillow cannot read.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as source:
+            image_format = source.format
+            if image_format not in _SAVE_MODES:
+                raise ValueError(f"Unsupported image format: {image_format}")
+            largest = max(sizes)
+            # JPEG decodes straight at 1/2..1/8 scale when that is still >= largest
+            source.draft(source.mode, (largest, largest))
+            image = ImageOps.exif_transpose(source)
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"Not a readable image: {e}")
+
+    if image.mode not in _SAVE_MODES[image_format]:
+        image = image.convert("RGBA" if "A" in image.mode and "RGBA" in _SAVE_MODES[image_format] else "RGB")
+    derivatives = {}
+    # Largest first, each size resized from the previous one
+    for size in sorted(set(sizes), reverse=True):
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        if image_format in ("JPEG", "WEBP"):
+            image.save(out, image_format, quality=quality)
+        else:
+            image.save(out, image_format, optimize=True)
+        derivatives[size] = out.getvalue()
+    return derivatives
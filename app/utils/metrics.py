@@ -0,0 +1,167 @@
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Latency bucket upper bounds in seconds (Prometheus defaults, plus 1-2.5 ms)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Quantiles reported next to each histogram
+QUANTILES = (0.5, 0.95, 0.99)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram. Not thread-safe on its own; the registry
+    serializes access.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile by linear interpolation inside its bucket
+        (the same estimate as Prometheus' histogram_quantile).
+        """
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def cumulative(self) -> List[int]:
+        total = 0
+        result = []
+        for bucket_count in self.counts:
+            total += bucket_count
+            result.append(total)
+        return result
+
+
+class EndpointStats:
+    def __init__(self, buckets: Sequence[float]):
+        self.requests = 0
+        self.errors = 0
+        self.latency = Histogram(buckets)
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics keyed by endpoint name: request and error
+    counts plus a latency histogram. Per worker process, like the caches.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats(self.buckets)
+            stats.requests += 1
+            if error:
+                stats.errors += 1
+            stats.latency.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Plain-dict view: counts, latency sum and p50/p95/p99 per endpoint.
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "latency_sum_seconds": stats.latency.sum,
+                    **{f"p{int(q * 100)}_seconds": stats.latency.quantile(q) for q in QUANTILES},
+                }
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines = [
+            "# HELP http_requests_total Requests handled, by endpoint.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for endpoint, stats in endpoints:
+                lines.append(f'http_requests_total{{endpoint="{endpoint}"}} {stats.requests}')
+            lines += [
+                "# HELP http_request_errors_total Requests that raised an exception, by endpoint.",
+                "# TYPE http_request_errors_total counter",
+            ]
+            for endpoint, stats in endpoints:
+                lines.append(f'http_request_errors_total{{endpoint="{endpoint}"}} {stats.errors}')
+            lines += [
+                "# HELP http_request_duration_seconds Handler latency, by endpoint.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for endpoint, stats in endpoints:
+                histogram = stats.latency
+                bounds = [_format_value(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, total in zip(bounds, histogram.cumulative()):
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {total}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {_format_value(histogram.sum)}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {histogram.count}')
+            lines += [
+                "# HELP http_request_duration_quantile_seconds Latency quantiles estimated from the histogram.",
+                "# TYPE http_request_duration_quantile_seconds gauge",
+            ]
+            for endpoint, stats in endpoints:
+                for q in QUANTILES:
+                    lines.append(
+                        f'http_request_duration_quantile_seconds{{endpoint="{endpoint}",quantile="{q}"}} '
+                        f"{_format_value(stats.latency.quantile(q))}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def render_gauges(name: str, help_text: str, label: str, values: Iterable[tuple]) -> str:
+    """
+    One Prometheus gauge family from (label value, number) pairs.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f'{name}{{{label}="{key}"}} {_format_value(value)}' for key, value in values]
+    return "\n".join(lines) + "\n"
+
+
+def _format_value(value: Optional[float]) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
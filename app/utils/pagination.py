@@ -0,0 +1,109 @@
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Query, Response, status
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int, sort_value: Any = None, sort: str = "id") -> str:
+    """
+    Build an opaque cursor pointing after the given primary key and, for
+    lists sorted on another column, that column's value in the same row.
+    The sort it was issued for (column and direction) travels with it.
+    """
+    payload = {"id": last_id}
+    if sort_value is not None:
+        payload["k"] = sort_value
+    if sort != "id":
+        payload["s"] = sort
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Any, str]:
+    """
+    Return the (primary key, sort value, sort) encoded in a cursor; the sort
+    value is None for cursors of lists sorted by id.
+
+    Raises ValueError if the cursor was not produced by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id, sort_value, sort = payload["id"], payload.get("k"), payload.get("s", "id")
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int) or not isinstance(sort_value, (int, float, str, type(None))) or not isinstance(sort, str):
+        raise ValueError("Invalid cursor")
+    return last_id, sort_value, sort
+
+
+def split_page(rows: List[dict], limit: Optional[int], sort: str = "id") -> Tuple[List[dict], Optional[str]]:
+    """
+    Trim rows fetched with limit + 1 and compute the cursor of the next page
+    (sort: the list's sort, "-" prefixed for descending).
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    sort_field = sort.lstrip("-")
+    return page, encode_cursor(last["id"], last[sort_field] if sort_field != "id" else None, sort)
+
+
+def encode_token_cursor(token: str) -> str:
+    """
+    Opaque cursor wrapping a backend continuation token (S3 listings).
+    """
+    raw = json.dumps({"t": token}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token_cursor(cursor: str) -> str:
+    """
+    Raises ValueError if the cursor was not produced by encode_token_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        token = json.loads(base64.urlsafe_b64decode(padded.encode()))["t"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(token, str):
+        raise ValueError("Invalid cursor")
+    return token
+
+
+class PageParams:
+    """
+    Keyset pagination query parameters (?limit=&after=) for list endpoints.
+
+    Pages are read with `WHERE id > :after ORDER BY id LIMIT :limit`, an index
+    range scan whose cost does not depend on how deep the page is. Without
+    ?limit= a page has DEFAULT_PAGE_SIZE rows, so no request reads the whole
+    table. The next cursor travels in the X-Next-Cursor header so the body
+    stays a plain list; its absence marks the last page.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Page size"),
+        after: Optional[str] = Query(default=None, description=f"Opaque cursor taken from the {NEXT_CURSOR_HEADER} header"),
+    ):
+        self.limit = limit
+        try:
+            self.after_id, self.after_value, self.after_sort = decode_cursor(after) if after else (None, None, "id")
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    @property
+    def fetch_limit(self) -> int:
+        # One extra row tells us whether a next page exists
+        return self.limit + 1
+
+    def paginate(self, rows: List[dict], response: Response, sort: str = "id") -> List[dict]:
+        page, next_cursor = split_page(rows, self.limit, sort)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return page
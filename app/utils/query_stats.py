@@ -0,0 +1,118 @@
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Response headers set by QueryStatsMiddleware
+QUERY_COUNT_HEADER = "X-DB-Queries"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+class QueryStats:
+    """
+    Statements executed and time spent in the database during one request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000.0:.2f};desc="{self.count} queries"'
+
+
+# Stats of the current request. Sync endpoints run in the threadpool and
+# AsyncSession.run_sync in a greenlet; both inherit this context, so they
+# update the object the middleware created.
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count the statements run inside the block (in this context), e.g. to
+    check a service call against a query budget.
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def install_query_stats(sync_engine, slow_query_ms: Optional[float] = None) -> None:
+    """
+    Time every statement of sync_engine (for an AsyncEngine pass
+    async_engine.sync_engine), add it to the current QueryStats and log
+    statements slower than slow_query_ms. Parameters are never logged,
+    only how many there were.
+    """
+    slow_seconds = slow_query_ms / 1000.0 if slow_query_ms is not None else None
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if slow_seconds is not None and elapsed >= slow_seconds:
+            logger.warning(
+                "Slow query (%.2f ms, %s): %s",
+                elapsed * 1000.0,
+                _describe_parameters(parameters, executemany),
+                " ".join(statement.split()),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def discard_timer(exception_context):
+        # after_cursor_execute does not run for a failed statement
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
+
+
+def _describe_parameters(parameters, executemany: bool) -> str:
+    if executemany:
+        return f"{len(parameters)} parameter sets redacted"
+    return f"{len(parameters or ())} parameters redacted"
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that tracks the queries of each HTTP request and reports
+    them in X-DB-Queries and Server-Timing. Headers go out with the response
+    start, so streamed bodies only count the queries run before it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                    headers.append((SERVER_TIMING_HEADER.lower().encode(), stats.server_timing().encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
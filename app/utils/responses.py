@@ -0,0 +1,51 @@
+from typing import Any, Callable
+from fastapi import Response
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic_core import to_json
+from app.core.config import settings
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded by pydantic-core in one pass (datetimes included)
+    instead of jsonable_encoder + json.dumps.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+class WholeFileResponse(FileResponse):
+    """
+    FileResponse that always sends the whole file. Range requests the
+    caller accepted were already answered elsewhere; any other Range header
+    is ignored, as S3 does, instead of Starlette's own multi-range handling.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        headers = [(name, value) for name, value in scope["headers"] if name != b"range"]
+        await super().__call__({**scope, "headers": headers}, receive, send)
+
+
+def json_renderer(router_name: str) -> Callable[[Any, Response], Any]:
+    """
+    Return how a router's list endpoints hand their rows to FastAPI.
+
+    With router_name in FAST_JSON_ROUTERS the rows, plain dicts already in
+    the response_model shape built by the services, are encoded directly
+    into a FastJSONResponse carrying the headers set on response (ETag,
+    X-Next-Cursor). FastAPI then skips validating every row against the
+    response_model, which stays in place for the OpenAPI schema. Otherwise
+    the rows are returned unchanged and go through the regular path.
+    """
+    if router_name not in settings.FAST_JSON_ROUTERS:
+        return lambda content, response: content
+
+    def render(content: Any, response: Response) -> Response:
+        fast = FastJSONResponse(content, status_code=response.status_code or 200)
+        fast.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name not in (b"content-length", b"content-type")
+        )
+        return fast
+
+    return render
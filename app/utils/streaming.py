@@ -0,0 +1,71 @@
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_line(row: dict) -> str:
+    return json.dumps(row, default=_json_default, separators=(",", ":")) + "\n"
+
+
+def ndjson_stream(rows: Iterable[dict], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Encode rows as newline-delimited JSON while they are produced.
+
+    Lines are grouped into chunks of roughly chunk_size bytes so the server
+    does not issue one write per row; memory stays bounded by a single chunk.
+    """
+    buffer = []
+    buffered = 0
+    for row in rows:
+        line = _encode_line(row)
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def ndjson_stream_async(rows: AsyncIterable[dict], chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Async variant of ndjson_stream for rows produced by an async generator.
+    """
+    buffer = []
+    buffered = 0
+    async for row in rows:
+        line = _encode_line(row)
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def parse_ndjson(body: bytes) -> List[Any]:
+    """
+    Decode a newline-delimited JSON body, skipping blank lines.
+
+    Raises ValueError naming the first line that is not valid JSON.
+    """
+    values = []
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            values.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e.msg}")
+    return values
@@ -0,0 +1,34 @@
+"""
+Throughput of the sync (threadpool) and async (AsyncEngine) database modes
+under many concurrent clients, each served by uvicorn in a subprocess.
+
+    python -m benchmarks.bench_async_vs_sync --items 5000 --concurrency 500 --duration 15
+"""
+import argparse
+
+from benchmarks.common import create_schema, print_table, run_load, running_server, seed_items, use_temp_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    url = use_temp_database()
+    create_schema()
+    seed_items(args.items)
+    paths = ["/router/items/?limit=50", "/router/orders/?limit=50", "/router/categories/"]
+
+    rows = []
+    for mode, database_url in (("sync", url), ("async", url.replace("sqlite://", "sqlite+aiosqlite://", 1))):
+        with running_server({"DATABASE_URL": database_url}) as base_url:
+            stats = run_load(base_url, paths, args.concurrency, args.duration)
+        rows.append({"mode": mode, "clients": args.concurrency, **stats})
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Latency and statement count of OrderService.create_order vs. order line count.
+
+    python -m benchmarks.bench_create_order --lines 1,10,50,200,1000 --repeat 20
+"""
+import argparse
+
+from benchmarks.common import create_schema, print_table, seed_items, time_calls, use_temp_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", default="1,10,50,200,1000", help="comma separated line counts")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    line_counts = [int(n) for n in args.lines.split(",")]
+
+    use_temp_database()
+    create_schema()
+
+    from sqlalchemy import event
+    from app.db.session import engine
+    from app.services.order_service import OrderService
+
+    item_ids = seed_items(max(line_counts))
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements[0] += 1
+
+    rows = []
+    for count in line_counts:
+        payload = [{"item_id": item_id, "quantity": 1} for item_id in item_ids[:count]]
+        statements[0] = 0
+        OrderService.create_order(f"bench {count}", payload)
+        per_call = statements[0]
+        stats = time_calls(lambda: OrderService.create_order(f"bench {count}", payload), args.repeat)
+        rows.append({"lines": count, "statements": per_call, **stats})
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
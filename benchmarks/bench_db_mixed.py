@@ -0,0 +1,89 @@
+"""
+Mixed read/write throughput against a SQLite file with the legacy engine
+settings (rollback journal, synchronous=FULL, no busy_timeout) and with the
+tuned defaults (WAL, synchronous=NORMAL, busy_timeout, mmap).
+
+Each configuration runs in its own process because Settings are read at import.
+
+    python -m benchmarks.bench_db_mixed --threads 16 --duration 10 --write-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import print_table
+
+CONFIGURATIONS = {
+    "legacy": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_BUSY_TIMEOUT_MS": "0"},
+    "tuned": {},
+}
+
+
+def run_child(args) -> None:
+    from benchmarks.common import create_schema, seed_items, use_temp_database
+
+    use_temp_database()
+    create_schema()
+    from app.services.item_service import ItemService
+    from app.services.order_service import OrderService
+
+    item_ids = seed_items(args.items)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + args.duration
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < stop_at:
+            write = rng.random() < args.write_ratio
+            try:
+                if write:
+                    OrderService.create_order("bench", [{"item_id": rng.choice(item_ids), "quantity": 1}])
+                else:
+                    ItemService.list_items(limit=50, after_id=rng.choice(item_ids))
+                key = "writes" if write else "reads"
+            except Exception:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    print(json.dumps({**counts, "ops_per_s": (counts["reads"] + counts["writes"]) / elapsed}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    rows = []
+    for name, env in CONFIGURATIONS.items():
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_db_mixed", "--child", *sys.argv[1:]],
+            env={**os.environ, **env}, capture_output=True, text=True, check=True,
+        ).stdout
+        rows.append({"config": name, "threads": args.threads, **json.loads(output.strip().splitlines()[-1])})
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Load test of every router (items, orders, categories, s3) against a seeded
+SQLite database, in-process (httpx.ASGITransport) and over uvicorn, with a
+JSON report that can be compared across commits.
+
+    python -m benchmarks.bench_endpoints --items 100000 --order-lines 1000000 --output before.json
+    python -m benchmarks.bench_endpoints --items 100000 --order-lines 1000000 --compare before.json
+
+Each scenario runs --concurrency clients for --duration seconds. The
+database is seeded once and shared by every run; write scenarios (order
+creation, bulk upsert) run last so they do not change what the reads see.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Sequence
+
+from benchmarks.common import (
+    RequestSpec,
+    create_schema,
+    print_table,
+    run_load,
+    running_server,
+    seed_categories,
+    seed_items,
+    seed_orders,
+    use_temp_database,
+)
+
+TRANSPORTS = ("inprocess", "uvicorn")
+
+
+def build_scenarios(item_ids: Sequence[int], order_count: int, page_size: int) -> Dict[str, List[RequestSpec]]:
+    """
+    Requests per scenario, named <router>.<operation>. Cursors and ids are
+    drawn from a seeded RNG so every run issues the same request mix.
+    """
+    from app.utils.pagination import encode_cursor
+
+    rng = random.Random(42)
+    max_item_id = max(item_ids) if item_ids else 1
+    item_pages = [f"/router/items/?limit={page_size}&after={encode_cursor(rng.randrange(max_item_id))}" for _ in range(64)]
+    order_pages = [f"/router/orders/?limit={page_size}&after={encode_cursor(rng.randrange(max(order_count, 1)))}" for _ in range(64)]
+
+    def create_order(n: int):
+        lines = [{"item_id": item_id, "quantity": 1} for item_id in random.Random(n).sample(item_ids, min(5, len(item_ids)))]
+        return "POST", "/router/orders/", {"report": f"bench {n}", "items": lines}
+
+    def upsert_items(n: int):
+        rows = [
+            {"name": f"Bench upsert {n}-{i}", "sku": f"UPSERT-{n:08d}-{i:03d}", "price": 1.0, "stock": 10, "category_id": None}
+            for i in range(100)
+        ]
+        return "POST", "/router/items/bulk", rows
+
+    def upload_image(n: int):
+        return "POST", "/router/s3/simulate-upload-image", {"image_name": f"IMG{n:06d}.jpg", "maintenance_id": n % 100}
+
+    return {
+        "items.list_page": item_pages,
+        "items.list_first_page": [f"/router/items/?limit={page_size}"],
+        "categories.list": ["/router/categories/"],
+        "orders.list_page": order_pages,
+        "s3.list_images": [f"/router/s3/simulate-list-images/{n}" for n in range(100)],
+        "s3.upload_image": [upload_image],
+        "orders.create": [create_order],
+        "items.bulk_upsert_100": [upsert_items],
+    }
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=False).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_scenarios(scenarios: Dict[str, List[RequestSpec]], transport: str, concurrency: int, duration: float,
+                  database_url: str) -> List[Dict[str, object]]:
+    def measure(run: Callable[[List[RequestSpec]], Dict[str, float]]) -> List[Dict[str, object]]:
+        rows = []
+        for name, requests in scenarios.items():
+            stats = run(requests)
+            rows.append({"scenario": name, "transport": transport, "clients": concurrency, **stats})
+        return rows
+
+    if transport == "inprocess":
+        from app.main import app
+
+        return measure(lambda requests: run_load("http://bench", requests, concurrency, duration, app=app))
+
+    env = {"DATABASE_URL": database_url, "METRICS_LOG_SAMPLE_RATE": "0", "IDEMPOTENCY_PURGE_INTERVAL_SECONDS": "0"}
+    with running_server(env) as base_url:
+        return measure(lambda requests: run_load(base_url, requests, concurrency, duration))
+
+
+def compare(results: List[Dict[str, object]], baseline_path: str) -> List[Dict[str, object]]:
+    """
+    req/s and p99 of each scenario relative to a previous report (+% is
+    more throughput / higher latency).
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["transport"]): r for r in json.load(f)["results"]}
+    rows = []
+    for row in results:
+        before = baseline.get((row["scenario"], row["transport"]))
+        if before is None:
+            continue
+        rows.append({
+            "scenario": row["scenario"],
+            "transport": row["transport"],
+            "req_per_s": row["req_per_s"],
+            "req_per_s_change_pct": _change_pct(before["req_per_s"], row["req_per_s"]),
+            "p99_ms": row["p99_ms"],
+            "p99_change_pct": _change_pct(before["p99_ms"], row["p99_ms"]),
+        })
+    return rows
+
+
+def _change_pct(before: float, after: float) -> float:
+    return (after - before) / before * 100.0 if before else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--order-lines", type=int, default=100000)
+    parser.add_argument("--lines-per-order", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--transport", choices=TRANSPORTS + ("all",), default="all")
+    parser.add_argument("--scenarios", help="comma separated scenario names (default: all)")
+    parser.add_argument("--output", default="benchmark-report.json")
+    parser.add_argument("--compare", help="previous report to compare against")
+    args = parser.parse_args()
+
+    # Keep the per-request INFO logs of services out of the measurements
+    os.environ.setdefault("METRICS_LOG_SAMPLE_RATE", "0")
+    os.environ.setdefault("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "0")
+    database_url = use_temp_database()
+    logging.disable(logging.INFO)
+
+    started = time.perf_counter()
+    create_schema()
+    category_ids = seed_categories(args.categories)
+    item_ids = seed_items(args.items, category_ids=category_ids)
+    order_count = seed_orders(args.order_lines, args.lines_per_order, item_ids)
+    seed_seconds = time.perf_counter() - started
+    print(f"Seeded {len(item_ids)} items, {order_count} orders, {args.order_lines} lines in {seed_seconds:.1f}s")
+
+    scenarios = build_scenarios(item_ids, order_count, args.page_size)
+    if args.scenarios:
+        wanted = args.scenarios.split(",")
+        unknown = set(wanted) - set(scenarios)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = {name: scenarios[name] for name in wanted}
+
+    transports = TRANSPORTS if args.transport == "all" else (args.transport,)
+    results = []
+    for transport in transports:
+        results += run_scenarios(scenarios, transport, args.concurrency, args.duration, database_url)
+
+    report = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {**vars(args), "seed_seconds": seed_seconds},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_table(results)
+    if args.compare:
+        print()
+        print_table(compare(results, args.compare))
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
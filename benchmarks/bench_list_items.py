@@ -0,0 +1,96 @@
+"""
+Time, peak memory and statement count of ItemService._list_items (one Core
+query selecting the response columns) vs. the previous ORM path
+(query(Item).outerjoin(Category) + selectin load of Item.category).
+
+    python -m benchmarks.bench_list_items --items 100000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.common import create_schema, print_table, seed_categories, seed_items, use_temp_database
+
+
+def orm_list_items(session, limit=None, after_id=None):
+    """
+    The ORM implementation list_items used before the Core projection.
+    """
+    from app.models.category import Category
+    from app.models.item import Item
+
+    query = session.query(Item).outerjoin(Category)
+    if after_id is not None:
+        query = query.filter(Item.id > after_id)
+    return [
+        {
+            "id": item.id,
+            "name": item.name,
+            "sku": item.sku,
+            "price": item.price,
+            "stock": item.stock,
+            "category_id": item.category_id,
+            "category": {"id": item.category.id, "name": item.category.name} if item.category else None,
+        }
+        for item in query.order_by(Item.id).limit(limit).all()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    use_temp_database()
+    create_schema()
+    seed_items(args.items, category_ids=seed_categories(args.categories))
+
+    from sqlalchemy import event
+    from app.db.session import SessionLocal, engine
+    from app.services.item_service import ItemService
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements[0] += 1
+
+    implementations = {"orm": orm_list_items, "core": ItemService._list_items}
+    rows = []
+    for name, list_items in implementations.items():
+        def run():
+            # A fresh session per call, as the service does
+            with SessionLocal() as session:
+                return list_items(session)
+
+        statements[0] = 0
+        result = run()
+        per_call = statements[0]
+
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        rows.append({
+            "path": name,
+            "rows": len(result),
+            "statements": per_call,
+            "p50_ms": statistics.median(samples),
+            "min_ms": min(samples),
+            "peak_mb": peak / 1024 / 1024,
+        })
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
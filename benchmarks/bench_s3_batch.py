@@ -0,0 +1,97 @@
+"""
+Throughput of the S3Service batch operations (upload_many, copy_prefix,
+delete_many) vs. S3_MAX_CONCURRENCY, against a local S3 stand-in.
+
+    python -m benchmarks.bench_s3_batch --objects 200 --size-kb 256 --concurrency 1,4,16,32 --latency-ms 20
+
+By default a moto server is started in-process (pip install "moto[server]");
+pass --endpoint-url to use MinIO/LocalStack instead. A local stand-in
+answers in well under a millisecond, so --latency-ms adds a per-request
+delay (botocore before-send hook) to model the round trip to real S3,
+which is what the thread pool overlaps.
+"""
+import argparse
+import io
+import os
+import time
+
+from benchmarks.common import free_port, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--concurrency", default="1,4,16,32", help="comma separated S3_MAX_CONCURRENCY values")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--endpoint-url")
+    args = parser.parse_args()
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        from moto.server import ThreadedMotoServer
+
+        port = free_port()
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+        server.start()
+        endpoint_url = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ["S3_ENDPOINT_URL"] = endpoint_url
+    os.environ.setdefault("AWS_S3_BUCKET", "maintenance-bench")
+
+    import logging
+    from app.core.config import settings
+    from app.services.s3_service import S3Service
+
+    logging.getLogger("app.services.s3_service").setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    payload = os.urandom(args.size_kb * 1024)
+
+    def delay(**kwargs):
+        time.sleep(args.latency_ms / 1000.0)
+
+    rows = []
+    try:
+        for concurrency in (int(n) for n in args.concurrency.split(",")):
+            settings.S3_MAX_CONCURRENCY = concurrency
+            service = S3Service()
+            try:
+                service.s3_client.create_bucket(Bucket=service.bucket_name)
+            except service.s3_client.exceptions.BucketAlreadyOwnedByYou:
+                pass
+            if args.latency_ms:
+                service.s3_client.meta.events.register("before-send.s3", delay)
+
+            files = [(f"IMG{i:05d}.jpg", io.BytesIO(payload), "image/jpeg") for i in range(args.objects)]
+            timings = {}
+            start = time.perf_counter()
+            service.upload_many(1, files)
+            timings["upload"] = time.perf_counter() - start
+            start = time.perf_counter()
+            service.copy_prefix("maintenance/1/", "maintenance/2/", move=True)
+            timings["move"] = time.perf_counter() - start
+            keys = [f"maintenance/2/IMG{i:05d}.jpg" for i in range(args.objects)]
+            start = time.perf_counter()
+            service.delete_many(keys)
+            timings["delete"] = time.perf_counter() - start
+            service.executor.shutdown()
+
+            rows.append({
+                "concurrency": concurrency,
+                "objects": args.objects,
+                "upload_obj_per_s": args.objects / timings["upload"],
+                "upload_mb_per_s": args.objects * len(payload) / timings["upload"] / 1024 / 1024,
+                "move_obj_per_s": args.objects / timings["move"],
+                "delete_obj_per_s": args.objects / timings["delete"],
+            })
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+CPU time to turn list_items / list_orders rows into a response body: the
+regular FastAPI path (validate every row against the response_model, dump
+to JSON-compatible Python, json.dumps) vs. FastJSONResponse (pydantic-core
+encodes the service dicts directly).
+
+    python -m benchmarks.bench_serialization --rows 1000,10000,50000 --repeat 5
+"""
+import argparse
+import time
+from typing import List
+
+from benchmarks.common import create_schema, print_table, seed_categories, seed_items, seed_orders, use_temp_database
+
+
+def cpu_ms(func, repeat: int) -> float:
+    """
+    Best-of-repeat process CPU time of func in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        best = min(best, time.process_time() - start)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,10000,50000", help="comma separated response sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.rows.split(",")]
+
+    use_temp_database()
+    create_schema()
+    item_ids = seed_items(max(sizes), category_ids=seed_categories(20))
+    seed_orders(max(sizes) * 3, 3, item_ids)
+
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from app.schemas.item import ItemRead
+    from app.schemas.order import OrderRead
+    from app.services.item_service import ItemService
+    from app.services.order_service import OrderService
+    from app.utils.responses import FastJSONResponse
+
+    endpoints = {
+        "list_items": (TypeAdapter(List[ItemRead]), ItemService.list_items(limit=max(sizes))),
+        "list_orders": (TypeAdapter(List[OrderRead]), OrderService.list_orders(limit=max(sizes))),
+    }
+
+    rows = []
+    for name, (adapter, all_rows) in endpoints.items():
+        for size in sizes:
+            page = all_rows[:size]
+
+            def regular():
+                # What FastAPI does with response_model + JSONResponse
+                JSONResponse(adapter.dump_python(adapter.validate_python(page), mode="json"))
+
+            def fast():
+                FastJSONResponse(page)
+
+            regular_ms = cpu_ms(regular, args.repeat)
+            fast_ms = cpu_ms(fast, args.repeat)
+            rows.append({
+                "endpoint": name,
+                "rows": len(page),
+                "regular_cpu_ms": regular_ms,
+                "fast_cpu_ms": fast_ms,
+                "speedup": regular_ms / fast_ms if fast_ms else 0.0,
+            })
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
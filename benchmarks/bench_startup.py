@@ -0,0 +1,84 @@
+"""
+Cold start of one worker: time to import app.main and to run the app
+lifespan, in development and production mode. Every sample is a fresh
+interpreter, as for a newly started worker.
+
+    python -m benchmarks.bench_startup --repeat 10
+
+s3_client_ms is the one-off cost of the first S3 call, which builds the
+boto3 client lazily instead of at import time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import create_schema, percentile, print_table, use_temp_database
+
+MODES = {
+    "development": {"APP_ENV": "development"},
+    "production": {"APP_ENV": "production"},
+}
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def run_lifespan():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+
+asyncio.run(run_lifespan())
+lifespan_done = time.perf_counter()
+from app.services.s3_service import s3_service
+s3_service.s3_client
+s3_done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000.0,
+    "lifespan_ms": (lifespan_done - imported) * 1000.0,
+    "s3_client_ms": (s3_done - lifespan_done) * 1000.0,
+}))
+"""
+
+
+def sample(env) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    url = use_temp_database()
+    create_schema()
+    # Never open a browser from the benchmark; the purge job is not startup cost
+    base_env = {"DATABASE_URL": url, "OPEN_BROWSER_ON_STARTUP": "false", "IDEMPOTENCY_PURGE_INTERVAL_SECONDS": "0"}
+
+    rows = []
+    for mode, env in MODES.items():
+        samples = [sample({**base_env, **env}) for _ in range(args.repeat)]
+        row = {"mode": mode}
+        for key in ("import_ms", "lifespan_ms", "s3_client_ms"):
+            values = [s[key] for s in samples]
+            row[f"{key[:-3]}_p50_ms"] = statistics.median(values)
+            row[f"{key[:-3]}_p99_ms"] = percentile(values, 99)
+        row["startup_p50_ms"] = statistics.median(s["import_ms"] + s["lifespan_ms"] for s in samples)
+        rows.append(row)
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Thumbnail rendering throughput (render_thumbnails, THUMBNAIL_SIZES) vs.
+the number of pool processes: images/s and images/s per worker.
+
+    python -m benchmarks.bench_thumbnails --images 64 --width 4032 --height 3024 --workers 1,2,4,8
+
+Sources are synthetic JPEGs (gradient plus noise, about a phone photo's
+size) in temporary files, read by the workers as on upload. Only rendering is timed; the pool is warmed up first so process
+start-up is excluded. Per-worker throughput should stay roughly flat up to
+the number of physical cores.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import print_table
+
+
+def synthetic_jpeg(path: str, width: int, height: int, seed: int) -> str:
+    from PIL import Image, ImageChops
+
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40 + seed % 20).convert("RGB")
+    ImageChops.add(gradient, noise, scale=2.0).save(path, "JPEG", quality=90)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.utils.images import render_thumbnails
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        # A few distinct sources, cycled: encoding them is slower than resizing
+        sources = [synthetic_jpeg(os.path.join(directory, f"{seed}.jpg"), args.width, args.height, seed) for seed in range(4)]
+        images = [sources[i % len(sources)] for i in range(args.images)]
+        sizes, quality = settings.THUMBNAIL_SIZES, settings.THUMBNAIL_QUALITY
+
+        for workers in (int(n) for n in args.workers.split(",")):
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                list(pool.map(render_thumbnails, sources[:1] * workers, [sizes] * workers, [quality] * workers))
+                start = time.perf_counter()
+                list(pool.map(render_thumbnails, images, [sizes] * len(images), [quality] * len(images)))
+                elapsed = time.perf_counter() - start
+            rows.append({
+                "workers": workers,
+                "images": len(images),
+                "source_kb": sum(os.path.getsize(s) for s in sources) // len(sources) // 1024,
+                "images_per_s": len(images) / elapsed,
+                "images_per_s_per_worker": len(images) / elapsed / workers,
+            })
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Throughput scaling of `python -m app.serve` from 1 to N workers on a
+read-heavy mix over a shared SQLite (WAL) file.
+
+    python -m benchmarks.bench_workers --workers 1,2,4,8 --concurrency 256 --duration 15
+
+On a machine with fewer cores than workers the extra workers only add
+contention; scaling stops at the core count.
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.common import create_schema, free_port, print_table, run_load, running_server, seed_items, use_temp_database
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)), help="comma separated worker counts")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    url = use_temp_database()
+    create_schema()
+    seed_items(args.items)
+    paths = ["/router/items/?limit=50", "/router/orders/?limit=50", "/router/categories/"]
+    env = {"DATABASE_URL": url, "APP_ENV": "production", "METRICS_LOG_SAMPLE_RATE": "0"}
+
+    rows = []
+    for workers in (int(n) for n in args.workers.split(",")):
+        port = free_port()
+        command = [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+        with running_server(env, port=port, command=command) as base_url:
+            stats = run_load(base_url, paths, args.concurrency, args.duration)
+        rows.append({"workers": workers, "clients": args.concurrency, **stats})
+
+    base = rows[0]["req_per_s"] or 1.0
+    for row in rows:
+        row["speedup"] = row["req_per_s"] / base
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
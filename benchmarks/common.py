@@ -0,0 +1,232 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run benchmarks from the repository root, e.g. `python -m benchmarks.bench_create_order`.
+Each script works on a throw-away SQLite database so it never touches
+maintenance.db.
+"""
+import asyncio
+import contextlib
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+def use_temp_database(name: str = "bench.db") -> str:
+    """
+    Point DATABASE_URL at a fresh SQLite file. Must run before importing app.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="maintenance-bench-"), name)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return os.environ["DATABASE_URL"]
+
+
+def create_schema() -> None:
+    from app.db.session import Base, engine
+    import app.models  # noqa: F401  registers the tables
+
+    Base.metadata.create_all(bind=engine)
+
+
+def seed_categories(count: int) -> List[int]:
+    from sqlalchemy import insert, select
+    from app.db.session import engine
+    from app.models import Category
+
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"name": f"Category {i}"} for i in range(count)])
+        return list(conn.scalars(select(Category.id).order_by(Category.id)))
+
+
+def seed_items(count: int, batch_size: int = 500, prefix: str = "BENCH",
+               category_ids: Sequence[int] = ()) -> List[int]:
+    """
+    Insert count items through the bulk upsert path and return their ids.
+    """
+    from app.services.item_service import ItemService
+
+    rows = [
+        {
+            "name": f"Item {i}",
+            "sku": f"{prefix}-{i:08d}",
+            "price": 10.0 + i % 100,
+            "stock": 1_000_000,
+            "category_id": category_ids[i % len(category_ids)] if category_ids else None,
+        }
+        for i in range(count)
+    ]
+    results = ItemService.bulk_upsert_items(rows, batch_size)
+    return [r["id"] for r in results]
+
+
+def seed_orders(line_count: int, lines_per_order: int, item_ids: Sequence[int], batch_size: int = 20000) -> int:
+    """
+    Insert orders holding line_count order lines in total with Core
+    executemany (no ORM, no stock reservation) and return the order count.
+    Seeding a million lines this way takes seconds instead of minutes.
+    """
+    from sqlalchemy import func, insert, select
+    from app.db.session import engine
+    from app.models import Order
+    from app.models.order import order_items
+
+    lines_per_order = max(1, min(lines_per_order, len(item_ids)))
+    order_count = -(-line_count // lines_per_order)
+    with engine.begin() as conn:
+        first_id = (conn.scalar(select(func.max(Order.id))) or 0) + 1
+        for start in range(0, order_count, batch_size):
+            stop = min(start + batch_size, order_count)
+            conn.execute(insert(Order), [{"id": first_id + n, "report": f"Order {n}"} for n in range(start, stop)])
+        lines = []
+        for n in range(line_count):
+            order_index, line = divmod(n, lines_per_order)
+            item_id = item_ids[(order_index * lines_per_order + line) % len(item_ids)]
+            lines.append({"order_id": first_id + order_index, "item_id": item_id, "quantity": 1 + n % 5})
+            if len(lines) == batch_size:
+                conn.execute(insert(order_items), lines)
+                lines = []
+        if lines:
+            conn.execute(insert(order_items), lines)
+    return order_count
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    Call func repeat times and return latency stats in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "min_ms": min(samples),
+        "p50_ms": statistics.median(samples),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def print_table(rows: List[Dict[str, object]]) -> None:
+    if not rows:
+        return
+    columns = list(rows[0])
+    cells = [[f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for r in cells:
+        print("  ".join(v.rjust(w) for v, w in zip(r, widths)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def running_server(env: Dict[str, str], args: Sequence[str] = (), port: Optional[int] = None,
+                   command: Optional[Sequence[str]] = None) -> Iterator[str]:
+    """
+    Run the API in a subprocess (uvicorn by default) and yield its base URL
+    once it answers. The server is terminated on exit.
+    """
+    import httpx
+
+    port = port or free_port()
+    command = list(command or [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"])
+    process = subprocess.Popen(command + list(args), env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                httpx.get(f"{base_url}/openapi.json", timeout=1.0)
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("server did not start within 30s")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# A load-test request: a GET path, or a callable building (method, path, json body)
+# from a request sequence number so payloads can vary (unique SKUs, etc.)
+RequestSpec = Union[str, Callable[[int], Tuple[str, str, Optional[object]]]]
+
+
+def _build_request(spec: RequestSpec, n: int) -> Tuple[str, str, Optional[object]]:
+    if isinstance(spec, str):
+        return "GET", spec, None
+    return spec(n)
+
+
+async def _drive(base_url: str, requests: Sequence[RequestSpec], concurrency: int, duration: float,
+                 app=None) -> Dict[str, float]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = [0]
+    stop_at = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    # In-process: requests go straight to the ASGI app, no sockets or server
+    transport = httpx.ASGITransport(app=app) if app is not None else None
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0, transport=transport) as client:
+        # Shared sequence number: unique across clients, rotates over requests
+        sequence = itertools.count()
+
+        async def worker() -> None:
+            while time.perf_counter() < stop_at:
+                n = next(sequence)
+                method, path, body = _build_request(requests[n % len(requests)], n)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    if response.status_code >= 400:
+                        errors[0] += 1
+                except httpx.HTTPError:
+                    errors[0] += 1
+                latencies.append((time.perf_counter() - start) * 1000.0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "req_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) if latencies else 0.0,
+    }
+
+
+def run_load(base_url: str, requests: Sequence[RequestSpec], concurrency: int, duration: float,
+             app=None) -> Dict[str, float]:
+    """
+    Drive requests from concurrency clients for duration seconds and return
+    throughput and latency stats. With app, requests are served in-process
+    through httpx.ASGITransport instead of over base_url.
+    """
+    return asyncio.run(_drive(base_url, requests, concurrency, duration, app))
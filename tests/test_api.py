@@ -1,20 +1,25 @@
 import os
-import importlib
 import pytest
 from fastapi.testclient import TestClient
 
 
-@pytest.fixture(scope="function")
-def client(tmp_path):
-    db_path = tmp_path / "test.db"
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory):
+    # Must be set before app.db.session is imported: the engine is built once
+    db_path = tmp_path_factory.mktemp("db") / "test.db"
     os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    return os.environ["DATABASE_URL"]
 
-    import app.core.config as config
-    import app.db.session as session
-    importlib.reload(config)
-    importlib.reload(session)
 
+@pytest.fixture(scope="function")
+def client(database_url):
     import app.main as main
+    from app.db.session import Base, engine
+    from app.utils.cache import clear_all_caches
+
+    # Never drop tables of a database that is not the test one
+    assert str(engine.url) == database_url
+
     main.webbrowser.open = lambda *args, **kwargs: True
 
     class DummyTimer:
@@ -26,12 +31,75 @@ def client(tmp_path):
 
     main.threading.Timer = DummyTimer
 
-    session.Base.metadata.drop_all(bind=session.engine)
-    session.Base.metadata.create_all(bind=session.engine)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    clear_all_caches()
 
     return TestClient(main.app)
 
 
+@pytest.fixture(scope="function")
+def async_client(database_url, monkeypatch):
+    """
+    Client for the async routers/services (async database mode), backed by
+    aiosqlite on the same test database.
+    """
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.db.session import Base, engine
+    from app.routers import async_categories, async_items, async_orders
+    from app.services import async_category_service, async_item_service, async_order_service, async_version_service
+    from app.utils.cache import clear_all_caches
+
+    async_engine = create_async_engine(database_url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    for module in (async_category_service, async_item_service, async_order_service, async_version_service):
+        monkeypatch.setattr(module, "AsyncSessionLocal", factory)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    clear_all_caches()
+
+    app = FastAPI()
+    app.include_router(async_items.router, prefix="/router/items")
+    app.include_router(async_orders.router, prefix="/router/orders")
+    app.include_router(async_categories.router, prefix="/router/categories")
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(async_engine.dispose)
+
+
+@pytest.fixture(scope="function")
+def s3_bucket(monkeypatch):
+    """
+    In-memory S3 (moto) with the configured bucket; s3_service builds its
+    client inside the mock.
+    """
+    from moto import mock_aws
+    from app.services.s3_service import s3_service
+
+    with mock_aws():
+        monkeypatch.setattr(s3_service, "_s3_client", None)
+        s3_service.s3_client.create_bucket(Bucket=s3_service.bucket_name)
+        yield s3_service
+    s3_service._s3_client = None
+
+
+@pytest.fixture(params=["s3", "local"])
+def storage(request, monkeypatch, tmp_path):
+    """
+    s3_service on each storage backend: moto S3 or a temporary directory.
+    """
+    from app.services.s3_service import s3_service
+    from app.services.storage import LocalBackend
+
+    if request.param == "s3":
+        yield request.getfixturevalue("s3_bucket")
+    else:
+        monkeypatch.setattr(s3_service, "backend", LocalBackend(str(tmp_path)))
+        yield s3_service
+
+
 def test_create_and_list_categories(client):
     res = client.post("/router/categories/", json={"name": "Filtros"})
     assert res.status_code == 201
@@ -118,12 +186,1094 @@ def test_create_order_idempotent(client):
         json=payload,
         headers={"Idempotency-Key": "abc123"},
     )
-    assert res2.status_code == 201
+    assert res2.status_code == 200
     order2 = res2.json()
 
     assert order1["id"] == order2["id"]
+    # The stored response is replayed verbatim, created_at included
+    assert res2.content == res1.content
+    assert order2["created_at"] is not None
 
     res_list = client.get("/router/orders/")
     assert res_list.status_code == 200
     orders = res_list.json()
     assert len(orders) == 1
+
+
+def test_idempotency_keys_cache_expiry_and_purge(client):
+    from datetime import datetime, timezone
+    from sqlalchemy import event, select, update
+    from sqlalchemy.engine import Engine
+    from app.db.session import SessionLocal
+    from app.models.idempotency import IdempotencyKey
+    from app.services.idempotency_service import IdempotencyService, idempotency_cache
+
+    item = client.post(
+        "/router/items/",
+        json={"name": "Aceite", "sku": "SKU-I001", "price": 9.0, "stock": 100, "category_id": None},
+    ).json()
+    payload = {"report": "Cambio de aceite", "items": [{"item_id": item["id"], "quantity": 1}]}
+    first = client.post("/router/orders/", json=payload, headers={"Idempotency-Key": "key-1"}).json()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Recent keys are replayed from memory
+    event.listen(Engine, "before_cursor_execute", count_statement)
+    try:
+        replay = client.post("/router/orders/", json=payload, headers={"Idempotency-Key": "key-1"})
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_statement)
+    assert replay.json()["id"] == first["id"]
+    assert statements == []
+
+    # Without the front cache the stored response costs one indexed lookup
+    idempotency_cache.invalidate()
+    event.listen(Engine, "before_cursor_execute", count_statement)
+    try:
+        replay = client.post("/router/orders/", json=payload, headers={"Idempotency-Key": "key-1"})
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_statement)
+    assert replay.json() == first
+    assert len(statements) == 1
+
+    # Keys stored without a response body are rebuilt from the order
+    with SessionLocal() as session:
+        session.execute(update(IdempotencyKey).values(response_body=None))
+        session.commit()
+    idempotency_cache.invalidate()
+    assert client.post("/router/orders/", json=payload, headers={"Idempotency-Key": "key-1"}).json() == first
+
+    for key in ("key-2", "key-3", "key-4"):
+        client.post("/router/orders/", json=payload, headers={"Idempotency-Key": key})
+    expired_at = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    with SessionLocal() as session:
+        session.execute(
+            update(IdempotencyKey).where(IdempotencyKey.request_key != "key-4").values(created_at=expired_at)
+        )
+        session.commit()
+    idempotency_cache.invalidate()
+
+    # An expired key is reused for a new order
+    res = client.post("/router/orders/", json=payload, headers={"Idempotency-Key": "key-1"})
+    assert res.status_code == 201 and res.json()["id"] != first["id"]
+
+    # The purge removes the remaining expired keys in batches
+    assert IdempotencyService.purge_expired(batch_size=1) == 2
+    with SessionLocal() as session:
+        keys = set(session.scalars(select(IdempotencyKey.request_key)))
+    assert keys == {"key-1", "key-4"}
+
+
+def test_list_orders_statement_count_is_constant(client):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    item = client.post(
+        "/router/items/",
+        json={"name": "Bujia", "sku": "SKU-4004", "price": 5.0, "stock": 50, "category_id": None},
+    ).json()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def list_orders_statement_count():
+        statements.clear()
+        event.listen(Engine, "before_cursor_execute", count_statement)
+        try:
+            res = client.get("/router/orders/")
+        finally:
+            event.remove(Engine, "before_cursor_execute", count_statement)
+        assert res.status_code == 200
+        return len(statements), res.json()
+
+    for i in range(2):
+        client.post("/router/orders/", json={"report": f"Orden {i}", "items": [{"item_id": item["id"], "quantity": 1}]})
+    few_count, few_orders = list_orders_statement_count()
+
+    for i in range(10):
+        client.post("/router/orders/", json={"report": f"Orden extra {i}", "items": [{"item_id": item["id"], "quantity": 2}]})
+    many_count, many_orders = list_orders_statement_count()
+
+    assert len(many_orders) == len(few_orders) + 10
+    assert many_count == few_count
+    assert all(order["items"] for order in many_orders)
+
+
+def test_list_items_keyset_pagination(client):
+    for i in range(5):
+        client.post(
+            "/router/items/",
+            json={"name": f"Item {i}", "sku": f"SKU-50{i}", "price": 1.0, "stock": 1, "category_id": None},
+        )
+
+    seen = []
+    res = client.get("/router/items/", params={"limit": 2})
+    while True:
+        assert res.status_code == 200
+        page = res.json()
+        assert len(page) <= 2
+        seen.extend(item["id"] for item in page)
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        res = client.get("/router/items/", params={"limit": 2, "after": cursor})
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    # Without limit the full list is still returned
+    assert len(client.get("/router/items/").json()) == 5
+
+
+def test_list_pagination_rejects_invalid_cursor(client):
+    res = client.get("/router/categories/", params={"limit": 2, "after": "not-a-cursor"})
+    assert res.status_code == 400
+
+    res = client.get("/router/orders/", params={"limit": 0})
+    assert res.status_code == 422
+
+
+def test_export_items_and_orders_as_ndjson(client):
+    import json
+
+    cat = client.post("/router/categories/", json={"name": "Frenos"}).json()
+    first = client.post(
+        "/router/items/",
+        json={"name": "Pastilla", "sku": "SKU-6001", "price": 30.0, "stock": 8, "category_id": cat["id"]},
+    ).json()
+    second = client.post(
+        "/router/items/",
+        json={"name": "Disco", "sku": "SKU-6002", "price": 80.0, "stock": 2, "category_id": None},
+    ).json()
+    client.post(
+        "/router/orders/",
+        json={"report": "Cambio de frenos", "items": [{"item_id": first["id"], "quantity": 2}, {"item_id": second["id"], "quantity": 1}]},
+    )
+    client.post("/router/orders/", json={"report": "Revision", "items": [{"item_id": second["id"], "quantity": 1}]})
+
+    res = client.get("/router/items/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in res.text.splitlines()]
+    assert [item["sku"] for item in items] == ["SKU-6001", "SKU-6002"]
+    assert items[0]["category"] == {"id": cat["id"], "name": "Frenos"}
+    assert items[1]["category"] is None
+
+    res = client.get("/router/orders/export")
+    assert res.status_code == 200
+    orders = [json.loads(line) for line in res.text.splitlines()]
+    assert len(orders) == 2
+    assert sorted(line["item_id"] for line in orders[0]["items"]) == sorted([first["id"], second["id"]])
+    assert orders[1]["items"] == [{"item_id": second["id"], "quantity": 1}]
+    assert orders[0]["created_at"] is not None
+
+
+def test_create_item_duplicate_sku_conflict(client):
+    payload = {"name": "Correa", "sku": "SKU-7001", "price": 15.0, "stock": 3, "category_id": None}
+    assert client.post("/router/items/", json=payload).status_code == 201
+    res = client.post("/router/items/", json=payload)
+    assert res.status_code == 409
+
+
+def test_bulk_upsert_items_by_sku(client):
+    client.post(
+        "/router/items/",
+        json={"name": "Aceite 5W30", "sku": "SKU-8000", "price": 10.0, "stock": 1, "category_id": None},
+    )
+
+    rows = [
+        {"name": "Aceite 5W30", "sku": "SKU-8000", "price": 12.5, "stock": 40, "category_id": None},
+        {"name": "Aceite 10W40", "sku": "SKU-8001", "price": 11.0, "stock": 20, "category_id": None},
+        {"name": "Sin precio", "sku": "SKU-8002", "stock": 1},
+        {"name": "Repetido", "sku": "SKU-8001", "price": 1.0, "stock": 1, "category_id": None},
+    ]
+    res = client.post("/router/items/bulk", json=rows)
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["created"], data["updated"], data["failed"]) == (1, 1, 2)
+    assert [r["status"] for r in data["results"]] == ["updated", "created", "error", "error"]
+    assert data["results"][2]["errors"]
+
+    items = {item["sku"]: item for item in client.get("/router/items/").json()}
+    assert len(items) == 2
+    assert items["SKU-8000"]["price"] == 12.5
+    assert items["SKU-8000"]["id"] == data["results"][0]["id"]
+    assert items["SKU-8001"]["stock"] == 20
+
+    ndjson = "\n".join(
+        '{"name": "Filtro %d", "sku": "SKU-81%02d", "price": 5.0, "stock": %d}' % (i, i, i) for i in range(30)
+    )
+    res = client.post("/router/items/bulk", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+    assert res.status_code == 200
+    assert res.json()["created"] == 30
+
+    res = client.post("/router/items/bulk", content="{broken", headers={"Content-Type": "application/x-ndjson"})
+    assert res.status_code == 400
+
+
+def test_create_order_batches_item_lookup_and_lines(client):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    rows = [
+        {"name": f"Repuesto {i}", "sku": f"SKU-90{i:02d}", "price": 1.0, "stock": 100, "category_id": None}
+        for i in range(30)
+    ]
+    results = client.post("/router/items/bulk", json=rows).json()["results"]
+    item_ids = [r["id"] for r in results]
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def create_order_statement_count(lines):
+        statements.clear()
+        event.listen(Engine, "before_cursor_execute", count_statement)
+        try:
+            res = client.post("/router/orders/", json={"report": "Servicio", "items": lines})
+        finally:
+            event.remove(Engine, "before_cursor_execute", count_statement)
+        return len(statements), res
+
+    few_count, res = create_order_statement_count([{"item_id": i, "quantity": 1} for i in item_ids[:3]])
+    assert res.status_code == 201
+    assert res.json()["created_at"] is not None
+
+    many_count, res = create_order_statement_count([{"item_id": i, "quantity": 1} for i in item_ids])
+    assert res.status_code == 201
+    assert len(res.json()["items"]) == 30
+    assert many_count == few_count
+
+    # Repeated item ids are merged into one line
+    res = client.post(
+        "/router/orders/",
+        json={"report": "Duplicado", "items": [{"item_id": item_ids[0], "quantity": 2}, {"item_id": item_ids[0], "quantity": 3}]},
+    )
+    assert res.status_code == 201
+    assert res.json()["items"] == [{"item_id": item_ids[0], "quantity": 5}]
+
+    # Every missing id is reported at once and nothing is written
+    before = len(client.get("/router/orders/").json())
+    res = client.post(
+        "/router/orders/",
+        json={"report": "Invalida", "items": [{"item_id": 99998, "quantity": 1}, {"item_id": item_ids[0]}, {"item_id": 99999}]},
+    )
+    assert res.status_code == 400
+    assert "99998" in res.json()["detail"] and "99999" in res.json()["detail"]
+    assert len(client.get("/router/orders/").json()) == before
+
+
+def test_create_order_reserves_stock(client):
+    item = client.post(
+        "/router/items/",
+        json={"name": "Amortiguador", "sku": "SKU-9500", "price": 90.0, "stock": 3, "category_id": None},
+    ).json()
+    other = client.post(
+        "/router/items/",
+        json={"name": "Rotula", "sku": "SKU-9501", "price": 20.0, "stock": 10, "category_id": None},
+    ).json()
+
+    res = client.post("/router/orders/", json={"report": "Suspension", "items": [{"item_id": item["id"], "quantity": 2}]})
+    assert res.status_code == 201
+
+    # Not enough stock for the first line: the whole order is rejected
+    res = client.post(
+        "/router/orders/",
+        json={"report": "Suspension", "items": [{"item_id": item["id"], "quantity": 2}, {"item_id": other["id"], "quantity": 1}]},
+    )
+    assert res.status_code == 409
+    assert f"item {item['id']}" in res.json()["detail"]
+
+    stock = {i["id"]: i["stock"] for i in client.get("/router/items/").json()}
+    assert stock == {item["id"]: 1, other["id"]: 10}
+
+    res = client.post("/router/orders/", json={"report": "Invalida", "items": [{"item_id": other["id"], "quantity": -5}]})
+    assert res.status_code == 422
+
+
+def test_concurrent_orders_never_oversell(client):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.order_service import InsufficientStockError, OrderService
+
+    initial_stock = 50
+    item = client.post(
+        "/router/items/",
+        json={"name": "Filtro Popular", "sku": "SKU-9600", "price": 9.0, "stock": initial_stock, "category_id": None},
+    ).json()
+
+    def place_order(n):
+        try:
+            OrderService.create_order(f"Orden {n}", [{"item_id": item["id"], "quantity": 1}])
+            return "created"
+        except InsufficientStockError:
+            return "rejected"
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(place_order, range(80)))
+
+    created = outcomes.count("created")
+    assert created == initial_stock
+    assert outcomes.count("rejected") == 80 - initial_stock
+
+    final_stock = next(i["stock"] for i in client.get("/router/items/").json() if i["id"] == item["id"])
+    assert final_stock == 0
+    assert len(client.get("/router/orders/").json()) == created
+
+
+def test_async_routers_full_flow(async_client):
+    import json
+
+    client = async_client
+    cat = client.post("/router/categories/", json={"name": "Motor"})
+    assert cat.status_code == 201
+    cat = cat.json()
+    assert client.patch(f"/router/categories/{cat['id']}", json={"name": "Motor y Transmision"}).json()["name"] == "Motor y Transmision"
+
+    item = client.post(
+        "/router/items/",
+        json={"name": "Embrague", "sku": "SKU-A001", "price": 300.0, "stock": 4, "category_id": cat["id"]},
+    )
+    assert item.status_code == 201
+    item = item.json()
+    assert item["category"]["name"] == "Motor y Transmision"
+    assert client.post("/router/items/", json={**{k: item[k] for k in ("name", "sku", "price", "stock")}}).status_code == 409
+
+    bulk = client.post(
+        "/router/items/bulk",
+        json=[{"name": f"Junta {i}", "sku": f"SKU-A1{i:02d}", "price": 2.0, "stock": 10} for i in range(5)],
+    ).json()
+    assert bulk["created"] == 5
+
+    assert client.patch(f"/router/items/{item['id']}", json={"price": 320.0}).json()["price"] == 320.0
+
+    page = client.get("/router/items/", params={"limit": 4})
+    assert len(page.json()) == 4
+    rest = client.get("/router/items/", params={"limit": 4, "after": page.headers["X-Next-Cursor"]})
+    assert len(rest.json()) == 2
+    assert "X-Next-Cursor" not in rest.headers
+
+    order = client.post(
+        "/router/orders/",
+        json={"report": "Cambio de embrague", "items": [{"item_id": item["id"], "quantity": 3}]},
+        headers={"Idempotency-Key": "async-1"},
+    )
+    assert order.status_code == 201
+    replay = client.post(
+        "/router/orders/",
+        json={"report": "Cambio de embrague", "items": [{"item_id": item["id"], "quantity": 3}]},
+        headers={"Idempotency-Key": "async-1"},
+    )
+    assert replay.json()["id"] == order.json()["id"]
+    res = client.post("/router/orders/", json={"report": "Otro", "items": [{"item_id": item["id"], "quantity": 3}]})
+    assert res.status_code == 409
+
+    res = client.get("/router/orders/")
+    orders = res.json()
+    assert len(orders) == 1 and orders[0]["items"] == [{"item_id": item["id"], "quantity": 3}]
+    assert client.get("/router/orders/", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+
+    exported = [json.loads(line) for line in client.get("/router/items/export").text.splitlines()]
+    assert len(exported) == 6
+    assert exported[0]["stock"] == 1
+    exported = [json.loads(line) for line in client.get("/router/orders/export").text.splitlines()]
+    assert [o["id"] for o in exported] == [orders[0]["id"]]
+
+
+def test_list_caches_serve_reads_and_invalidate_on_writes(client):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    cat = client.post("/router/categories/", json={"name": "Luces"}).json()
+    item = client.post(
+        "/router/items/",
+        json={"name": "Bombilla H4", "sku": "SKU-C001", "price": 4.0, "stock": 10, "category_id": cat["id"]},
+    ).json()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client.get("/router/items/")
+    client.get("/router/categories/")
+    event.listen(Engine, "before_cursor_execute", count_statement)
+    try:
+        assert client.get("/router/items/").json()[0]["stock"] == 10
+        assert client.get("/router/categories/").json()[0]["name"] == "Luces"
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_statement)
+    # Only the ETag version lookups reach the database
+    assert statements and all("table_versions" in statement for statement in statements)
+
+    stats = client.get("/router/cache/stats").json()
+    assert stats["items"]["hits"] >= 1 and stats["items"]["misses"] >= 1
+    assert stats["categories"]["hits"] >= 1
+
+    # Every write that changes what the lists return invalidates them
+    client.patch(f"/router/items/{item['id']}", json={"price": 5.0})
+    assert client.get("/router/items/").json()[0]["price"] == 5.0
+
+    client.post("/router/orders/", json={"report": "Luces", "items": [{"item_id": item["id"], "quantity": 3}]})
+    assert client.get("/router/items/").json()[0]["stock"] == 7
+
+    client.patch(f"/router/categories/{cat['id']}", json={"name": "Iluminacion"})
+    assert client.get("/router/items/").json()[0]["category"]["name"] == "Iluminacion"
+    assert client.get("/router/categories/").json()[0]["name"] == "Iluminacion"
+
+    client.post("/router/items/bulk", json=[{"name": "Bombilla H7", "sku": "SKU-C002", "price": 6.0, "stock": 1}])
+    assert len(client.get("/router/items/").json()) == 2
+
+
+def test_list_caches_follow_version_bumps_from_other_workers(client):
+    from sqlalchemy import update
+    from app.db.session import SessionLocal
+    from app.models import Category, Item
+    from app.services.version_service import VersionService
+
+    cat = client.post("/router/categories/", json={"name": "Filtros"}).json()
+    item = client.post(
+        "/router/items/",
+        json={"name": "Filtro aire", "sku": "SKU-W001", "price": 7.0, "stock": 10, "category_id": cat["id"]},
+    ).json()
+    assert client.get("/router/items/").json()[0]["stock"] == 10
+    assert client.get("/router/categories/").json()[0]["name"] == "Filtros"
+
+    # A write committed by another worker: this worker's caches are not invalidated
+    session = SessionLocal()
+    try:
+        session.execute(update(Item).where(Item.id == item["id"]).values(stock=3))
+        session.execute(update(Category).where(Category.id == cat["id"]).values(name="Filtrado"))
+        session.commit()
+        VersionService.bump(session, "items", "categories")
+    finally:
+        session.close()
+
+    res = client.get("/router/items/")
+    assert res.json()[0]["stock"] == 3 and res.json()[0]["category"]["name"] == "Filtrado"
+    assert client.get("/router/items/", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+    assert client.get("/router/categories/").json()[0]["name"] == "Filtrado"
+
+
+def test_list_endpoints_support_conditional_get(client):
+    cat = client.post("/router/categories/", json={"name": "Frenos"}).json()
+    item = client.post(
+        "/router/items/",
+        json={"name": "Pastilla", "sku": "SKU-E001", "price": 8.0, "stock": 5, "category_id": cat["id"]},
+    ).json()
+
+    res = client.get("/router/items/")
+    etag = res.headers["ETag"]
+    assert res.status_code == 200 and etag.startswith('W/"')
+
+    res = client.get("/router/items/", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["ETag"] == etag
+    # Each page has its own tag
+    assert client.get("/router/items/?limit=1").headers["ETag"] != etag
+
+    # Item, category and order (stock) writes all change the items tag
+    client.patch(f"/router/items/{item['id']}", json={"price": 9.0})
+    res = client.get("/router/items/", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.json()[0]["price"] == 9.0
+    etag = res.headers["ETag"]
+
+    client.patch(f"/router/categories/{cat['id']}", json={"name": "Frenado"})
+    res = client.get("/router/items/", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    orders_etag = client.get("/router/orders/").headers["ETag"]
+    client.post("/router/orders/", json={"report": "Frenos", "items": [{"item_id": item["id"], "quantity": 2}]})
+    assert client.get("/router/items/", headers={"If-None-Match": etag}).json()[0]["stock"] == 3
+    assert client.get("/router/orders/", headers={"If-None-Match": orders_etag}).status_code == 200
+
+    categories_etag = client.get("/router/categories/").headers["ETag"]
+    assert client.get("/router/categories/", headers={"If-None-Match": f'"x", {categories_etag}'}).status_code == 304
+
+
+def test_version_bump_runs_after_the_write_commits(client):
+    from sqlalchemy import event
+    from app.db.session import engine
+
+    item = client.post(
+        "/router/items/",
+        json={"name": "Correa", "sku": "SKU-E100", "price": 8.0, "stock": 5, "category_id": None},
+    ).json()
+    events = []
+
+    def on_execute(conn, cursor, statement, *args):
+        if "table_versions" in statement or "INSERT INTO orders" in statement:
+            events.append(statement.split()[2])
+
+    def on_commit(conn):
+        events.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    try:
+        client.post("/router/orders/", json={"report": "Correa", "items": [{"item_id": item["id"], "quantity": 1}]})
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(engine, "commit", on_commit)
+    # The counter row is not locked by the order transaction
+    assert events[:4] == ["orders", "COMMIT", "table_versions", "table_versions"]
+
+
+def test_ttl_cache_lru_ttl_and_generation():
+    import time
+    from app.utils.cache import MISSING, TTLCache
+
+    cache = TTLCache("test-lru", maxsize=2, ttl=60, max_rows=3)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is MISSING
+    assert cache.stats()["evictions"] == 1
+
+    # A value loaded before an invalidation is not stored
+    generation = cache.generation
+    cache.invalidate()
+    cache.set("d", 4, generation)
+    assert cache.get("d") is MISSING
+
+    # Lists over max_rows are returned but not kept
+    assert cache.get_or_load("big", lambda: [1, 2, 3, 4]) == [1, 2, 3, 4]
+    assert cache.get("big") is MISSING
+
+    short = TTLCache("test-ttl", maxsize=2, ttl=0.01)
+    short.set("a", 1)
+    time.sleep(0.02)
+    assert short.get("a") is MISSING
+
+
+def test_metrics_endpoint_counts_requests_and_errors(client, monkeypatch):
+    from app.services.s3_service import s3_service
+    from app.utils.metrics import registry
+
+    registry.reset()
+    client.post("/router/categories/", json={"name": "Frenos"})
+    for _ in range(3):
+        assert client.get("/router/categories/").status_code == 200
+    item = {"name": "Filtro", "sku": "SKU-9900", "price": 5.0, "stock": 1, "category_id": None}
+    client.post("/router/items/", json=item)
+    assert client.post("/router/items/", json=item).status_code == 409
+
+    def broken(*args):
+        raise RuntimeError("S3 unavailable")
+
+    monkeypatch.setattr(s3_service, "list_images", broken)
+    assert client.get("/router/s3/images/1").status_code == 500
+
+    snapshot = registry.snapshot()
+    assert snapshot["categories.list_categories"]["requests"] == 3
+    assert snapshot["categories.list_categories"]["errors"] == 0
+    # Expected 4xx answers are not errors, 5xx are
+    assert snapshot["items.create_item"]["requests"] == 2
+    assert snapshot["items.create_item"]["errors"] == 0
+    assert snapshot["s3.list_maintenance_images"]["errors"] == 1
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{endpoint="categories.list_categories"} 3' in res.text
+    assert 'http_request_errors_total{endpoint="s3.list_maintenance_images"} 1' in res.text
+    assert 'http_request_duration_seconds_bucket{endpoint="categories.list_categories",le="+Inf"} 3' in res.text
+    assert 'http_request_duration_quantile_seconds{endpoint="categories.list_categories",quantile="0.99"}' in res.text
+
+
+def test_metrics_time_streamed_exports_until_the_body_is_sent(client, monkeypatch):
+    import time
+    from app.services.item_service import ItemService
+    from app.utils.metrics import registry
+
+    def slow_rows(batch_size):
+        for i in range(3):
+            time.sleep(0.02)
+            yield {"id": i}
+
+    monkeypatch.setattr(ItemService, "iter_items", staticmethod(slow_rows))
+    registry.reset()
+    assert client.get("/router/items/export").text.count("\n") == 3
+    stats = registry.snapshot()["items.export_items"]
+    assert stats["requests"] == 1 and stats["latency_sum_seconds"] >= 0.06
+
+
+def test_histogram_quantiles():
+    from app.utils.metrics import Histogram
+
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        histogram.observe(0.005)
+    for _ in range(10):
+        histogram.observe(0.5)
+    assert histogram.cumulative() == [90, 90, 100, 100]
+    assert histogram.quantile(0.5) == pytest.approx(0.01 * 50 / 90)
+    assert 0.1 < histogram.quantile(0.95) <= 1.0
+    histogram.observe(30.0)  # +Inf bucket reports the largest finite bound
+    assert histogram.quantile(1.0) == 1.0
+
+
+# Statements per request, independent of the number of rows
+QUERY_BUDGETS = {
+    ("GET", "/router/items/"): 2,
+    ("GET", "/router/categories/"): 2,
+    ("GET", "/router/orders/"): 3,
+}
+
+
+def test_query_budgets_and_timing_headers(client):
+    from app.utils.cache import clear_all_caches
+
+    category = client.post("/router/categories/", json={"name": "Motor"}).json()
+    for i in range(5):
+        item = client.post(
+            "/router/items/",
+            json={"name": f"Piston {i}", "sku": f"SKU-97{i:02d}", "price": 30.0, "stock": 10, "category_id": category["id"]},
+        ).json()
+        client.post("/router/orders/", json={"report": f"Motor {i}", "items": [{"item_id": item["id"], "quantity": 1}]})
+
+    for (method, path), budget in QUERY_BUDGETS.items():
+        clear_all_caches()
+        res = client.request(method, path)
+        assert res.status_code == 200
+        assert 0 < int(res.headers["X-DB-Queries"]) <= budget, path
+        assert res.headers["Server-Timing"].startswith("db;dur=")
+
+    # A cached read does not touch the list tables, only the version check
+    client.get("/router/items/")
+    cached = client.get("/router/items/")
+    assert int(cached.headers["X-DB-Queries"]) < QUERY_BUDGETS[("GET", "/router/items/")]
+
+
+def test_slow_queries_are_logged_with_redacted_parameters(caplog):
+    from sqlalchemy import create_engine, text
+    from app.utils.query_stats import install_query_stats, track_queries
+
+    engine = create_engine("sqlite://")
+    install_query_stats(engine, slow_query_ms=0)
+    with caplog.at_level("WARNING", logger="app.utils.query_stats"), track_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+    assert stats.count == 1 and stats.seconds > 0
+    assert "SELECT ?" in caplog.text
+    assert "1 parameters redacted" in caplog.text
+    assert "hunter2" not in caplog.text
+
+
+def test_production_startup_skips_schema_and_browser(database_url, monkeypatch):
+    import app.main as main
+    from app.core.config import settings
+    from app.db.session import engine
+
+    # Production expects the schema to exist already
+    main.Base.metadata.create_all(bind=engine)
+    calls = []
+    monkeypatch.setattr(settings, "APP_ENV", "production")
+    monkeypatch.setattr(main.Base.metadata, "create_all", lambda *args, **kwargs: calls.append("create_all"))
+    monkeypatch.setattr(main.threading, "Timer", lambda *args, **kwargs: calls.append("timer"))
+
+    with TestClient(main.app) as client:
+        assert client.get("/router/categories/").status_code == 200
+    assert calls == []
+
+    # Explicit settings override the APP_ENV default
+    monkeypatch.setattr(settings, "CREATE_SCHEMA_ON_STARTUP", True)
+    with TestClient(main.app):
+        pass
+    assert calls == ["create_all"]
+
+
+def test_s3_client_is_built_on_first_use():
+    from app.services.s3_service import S3Service
+
+    service = S3Service()
+    assert service._s3_client is None
+    assert service.simulate_list_maintenance_images(1)["total_images"] == 3
+    assert service._s3_client is None
+    client = service.s3_client
+    assert client is service.s3_client
+
+
+def assert_fast_json_matches_regular(client, modules, monkeypatch):
+    """
+    Each router's list endpoints answer the same bytes on the fast path as
+    through response_model validation.
+    """
+    from app.core.config import settings
+    from app.utils.responses import json_renderer
+
+    category = client.post("/router/categories/", json={"name": "Eléctrico"}).json()
+    for i in range(3):
+        item = client.post(
+            "/router/items/",
+            json={"name": f"Fusible {i}", "sku": f"SKU-98{i:02d}", "price": 2.5, "stock": 10, "category_id": category["id"] if i else None},
+        ).json()
+        client.post("/router/orders/", json={"report": f"Luces {i}", "items": [{"item_id": item["id"], "quantity": 2}]})
+
+    monkeypatch.setattr(settings, "FAST_JSON_ROUTERS", ["items", "orders", "categories"])
+    for name, module in modules.items():
+        for path in (f"/router/{name}/", f"/router/{name}/?limit=2"):
+            monkeypatch.setattr(module, "render", json_renderer("disabled"))
+            regular = client.get(path)
+            monkeypatch.setattr(module, "render", json_renderer(name))
+            fast = client.get(path)
+            assert fast.status_code == regular.status_code == 200
+            assert fast.content == regular.content, path
+            for header in ("content-type", "content-length", "etag", "x-next-cursor"):
+                assert fast.headers.get(header) == regular.headers.get(header), (path, header)
+
+
+def test_fast_json_lists_match_response_models(client, monkeypatch):
+    from fastapi import Response
+    from app.routers import categories, items, orders
+    from app.utils.responses import FastJSONResponse, json_renderer
+
+    assert_fast_json_matches_regular(client, {"items": items, "orders": orders, "categories": categories}, monkeypatch)
+
+    # Routers not listed in FAST_JSON_ROUTERS keep the regular response_model path
+    rows = [{"id": 1}]
+    assert json_renderer("not-enabled")(rows, None) is rows
+    fast = json_renderer("items")(rows, Response(headers={"ETag": 'W/"1"'}))
+    assert isinstance(fast, FastJSONResponse)
+    assert fast.body == b'[{"id":1}]'
+    assert fast.headers["etag"] == 'W/"1"' and fast.headers["content-length"] == str(len(fast.body))
+
+
+def test_fast_json_async_lists_match_response_models(async_client, monkeypatch):
+    from app.routers import async_categories, async_items, async_orders
+
+    modules = {"items": async_items, "orders": async_orders, "categories": async_categories}
+    assert_fast_json_matches_regular(async_client, modules, monkeypatch)
+
+
+def test_list_items_filters_and_sort(client):
+    cat_a = client.post("/router/categories/", json={"name": "Filtros"}).json()
+    cat_b = client.post("/router/categories/", json={"name": "Aceites"}).json()
+    rows = [
+        {"name": f"Pieza {i}", "sku": f"{'FLT' if i % 2 else 'OIL'}-{i:03d}", "price": float(i % 7), "stock": i,
+         "category_id": cat_a["id"] if i % 2 else cat_b["id"]}
+        for i in range(30)
+    ]
+    client.post("/router/items/bulk", json=rows)
+
+    def fetch_all(params):
+        items, after = [], None
+        while True:
+            res = client.get("/router/items/", params={**params, "limit": 4, **({"after": after} if after else {})})
+            assert res.status_code == 200
+            items += res.json()
+            after = res.headers.get("X-Next-Cursor")
+            if not after:
+                return items
+
+    items = fetch_all({"category_id": cat_a["id"]})
+    assert [i["sku"] for i in items] == [r["sku"] for r in rows if r["category_id"] == cat_a["id"]]
+    assert {i["sku"][:3] for i in fetch_all({"sku_prefix": "OIL"})} == {"OIL"}
+    assert fetch_all({"sku_prefix": "OIL\U0010ffff"}) == []
+    assert fetch_all({"sku_prefix": "OIL\ud7ff"}) == []
+    assert {i["stock"] for i in fetch_all({"stock_below": 5})} == {0, 1, 2, 3, 4}
+    assert all(2 <= i["price"] <= 3 for i in fetch_all({"min_price": 2, "max_price": 3}))
+
+    # Keyset pages over (price, id), ties broken by id, in both directions
+    by_price = fetch_all({"sort": "price"})
+    assert [(i["price"], i["id"]) for i in by_price] == sorted((i["price"], i["id"]) for i in by_price)
+    assert len(by_price) == 30
+    by_stock_desc = fetch_all({"sort": "-stock", "category_id": cat_b["id"]})
+    assert [i["stock"] for i in by_stock_desc] == sorted((r["stock"] for r in rows if r["category_id"] == cat_b["id"]), reverse=True)
+
+    # A cursor only continues a list with the same sort column and direction
+    cursor = client.get("/router/items/", params={"sort": "price", "limit": 2}).headers["X-Next-Cursor"]
+    assert client.get("/router/items/", params={"after": cursor}).status_code == 400
+    assert client.get("/router/items/", params={"sort": "stock", "after": cursor}).status_code == 400
+    assert client.get("/router/items/", params={"sort": "-price", "after": cursor}).status_code == 400
+    assert client.get("/router/items/", params={"sort": "price", "after": cursor}).status_code == 200
+    id_cursor = client.get("/router/items/", params={"limit": 2}).headers["X-Next-Cursor"]
+    assert client.get("/router/items/", params={"sort": "-price", "after": id_cursor}).status_code == 400
+    assert client.get("/router/items/", params={"sort": "-id", "after": id_cursor}).status_code == 400
+    assert client.get("/router/items/", params={"sort": "name"}).status_code == 422
+
+
+def test_item_filters_use_indexes(client):
+    from sqlalchemy import text
+    from sqlalchemy.dialects import sqlite
+    from app.db.session import SessionLocal
+    from app.services.item_service import ItemFilter, ItemService
+
+    def plan(filters, after_id=None, after_value=None):
+        statement = ItemService._filtered_statement(filters, after_id, after_value).limit(50)
+        compiled = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+        with SessionLocal() as session:
+            return " ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert "ix_items_category_id_id" in plan(ItemFilter(category_id=1), after_id=10)
+    assert "ix_items_sku" in plan(ItemFilter(sku_prefix="FLT"))
+    assert "ix_items_stock_id" in plan(ItemFilter(stock_below=5, sort="stock"))
+    assert "ix_items_price_id" in plan(ItemFilter(sort="-price"), after_id=10, after_value=3.0)
+    assert "TEMP B-TREE" not in plan(ItemFilter(sort="-price"), after_id=10, after_value=3.0)
+
+
+def test_s3_streaming_upload_download_and_presigned_urls(client, s3_bucket, monkeypatch):
+    from app.core.config import settings
+
+    part_size = 5 * 1024 * 1024
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", part_size)
+    payload = bytes(range(256)) * (part_size * 2 // 256) + b"tail"
+
+    def body():
+        for start in range(0, len(payload), 64 * 1024):
+            yield payload[start:start + 64 * 1024]
+
+    res = client.put("/router/s3/images/7/IMG100.jpg", content=body(), headers={"Content-Type": "image/jpeg"})
+    assert res.status_code == 201
+    assert res.json()["parts"] == 3 and res.json()["size"] == len(payload)
+
+    res = client.get("/router/s3/images/7/IMG100.jpg")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/jpeg"
+    assert res.content == payload
+
+    # Small files go in a single PUT
+    res = client.put("/router/s3/images/7/small.png", content=b"png", headers={"Content-Type": "image/png"})
+    assert res.json()["parts"] == 1
+    assert client.get("/router/s3/images/7/small.png").content == b"png"
+
+    assert client.get("/router/s3/images/7/missing.jpg").status_code == 404
+    assert client.put("/router/s3/images/7/notes.txt", content=b"x").status_code == 400
+
+    # Rejected after the first part was sent: the multipart upload is aborted
+    monkeypatch.setattr(settings, "S3_MAX_UPLOAD_BYTES", part_size + 1)
+    assert client.put("/router/s3/images/7/big.jpg", content=body()).status_code == 413
+    uploads = s3_bucket.s3_client.list_multipart_uploads(Bucket=s3_bucket.bucket_name)
+    assert not uploads.get("Uploads")
+
+    res = client.post("/router/s3/presigned-upload", json={"maintenance_id": 7, "image_name": "IMG200.jpg", "content_type": "image/jpeg"})
+    assert res.status_code == 200
+    assert res.json()["method"] == "PUT" and "maintenance/7/IMG200.jpg" in res.json()["url"]
+    assert res.json()["headers"] == {"Content-Type": "image/jpeg"}
+    res = client.get("/router/s3/presigned-download/7/IMG100.jpg", params={"expires_in": 60})
+    assert "Signature" in res.json()["url"] or "X-Amz-Signature" in res.json()["url"]
+
+
+def test_s3_batch_upload_delete_and_move(client, s3_bucket, monkeypatch):
+    from app.core.config import settings
+
+    files = [("files", (f"IMG{i:03d}.jpg", f"photo {i}".encode(), "image/jpeg")) for i in range(12)]
+    files.append(("files", ("notes.txt", b"x", "text/plain")))
+    res = client.post("/router/s3/images/3/batch", files=files)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["uploaded"] == 12 and body["failed"] == 1
+    assert [r["image_name"] for r in body["results"]][:2] == ["IMG000.jpg", "IMG001.jpg"]
+    assert body["results"][-1]["status"] == "error"
+
+    res = client.post("/router/s3/images/3/copy", json={"target_maintenance_id": 4, "move": True})
+    assert res.json()["moved"] == 12 and res.json()["failed"] == 0
+    listed = s3_bucket.s3_client.list_objects_v2(Bucket=s3_bucket.bucket_name, Prefix="maintenance/")
+    assert {obj["Key"].split("/")[1] for obj in listed["Contents"]} == {"4"}
+    assert client.get("/router/s3/images/4/IMG005.jpg").content == b"photo 5"
+
+    res = client.post("/router/s3/images/4/copy", json={"target_maintenance_id": 5})
+    assert res.json()["copied"] == 12
+
+    names = [f"IMG{i:03d}.jpg" for i in range(12)]
+    res = client.post("/router/s3/images/delete-batch", json={"maintenance_id": 4, "image_names": names[:6] + ["../x.jpg"] + names[6:]})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["deleted"] == 12 and body["failed"] == 1
+    assert body["results"][6]["status"] == "error" and body["results"][6]["object_key"] is None
+    assert body["results"][:6] + body["results"][7:] == [{"object_key": f"maintenance/4/{n}", "status": "deleted"} for n in names]
+    listed = s3_bucket.s3_client.list_objects_v2(Bucket=s3_bucket.bucket_name, Prefix="maintenance/")
+    assert {obj["Key"].split("/")[1] for obj in listed["Contents"]} == {"5"}
+
+    # Chunks of 1000 keys per delete_objects call
+    keys = [f"maintenance/6/K{i:05d}.jpg" for i in range(2500)]
+    calls = []
+    real_delete = s3_bucket.s3_client.delete_objects
+
+    def counting_delete(**kwargs):
+        calls.append(len(kwargs["Delete"]["Objects"]))
+        return real_delete(**kwargs)
+
+    s3_bucket.s3_client.delete_objects = counting_delete
+    assert len(s3_bucket.delete_many(keys)) == 2500
+    assert sorted(calls) == [500, 1000, 1000]
+
+    # Each file is held to S3_MAX_UPLOAD_BYTES, the others still go through
+    monkeypatch.setattr(settings, "S3_MAX_UPLOAD_BYTES", 16)
+    files = [("files", ("BIG.jpg", b"x" * 17, "image/jpeg")), ("files", ("SMALL.jpg", b"x" * 16, "image/jpeg"))]
+    body = client.post("/router/s3/images/9/batch", files=files).json()
+    assert [r["status"] for r in body["results"]] == ["error", "uploaded"]
+    assert "maximum size" in body["results"][0]["error"]
+    assert client.get("/router/s3/images/9/BIG.jpg").status_code == 404
+
+
+def test_s3_list_images_pages_and_listing_cache(client, s3_bucket):
+    files = [("files", (f"IMG{i:03d}.jpg", b"jpg", "image/jpeg")) for i in range(5)]
+    client.post("/router/s3/images/8/batch", files=files)
+
+    names, cursor = [], None
+    while True:
+        res = client.get("/router/s3/images/8", params={"limit": 2, **({"after": cursor} if cursor else {})})
+        assert res.status_code == 200
+        page = res.json()
+        assert len(page["images"]) <= 2
+        names += [image["object_key"] for image in page["images"]]
+        cursor = page["next_cursor"]
+        assert res.headers.get("X-Next-Cursor") == cursor
+        if cursor is None:
+            break
+    assert names == [f"maintenance/8/IMG{i:03d}.jpg" for i in range(5)]
+    assert client.get("/router/s3/images/8", params={"after": "garbage"}).status_code == 400
+
+    # Repeated listings are served from the cache
+    calls = []
+    real_list = s3_bucket.s3_client.list_objects_v2
+    s3_bucket.s3_client.list_objects_v2 = lambda **kwargs: calls.append(kwargs) or real_list(**kwargs)
+    client.get("/router/s3/images/8")
+    client.get("/router/s3/images/8")
+    assert len(calls) == 1
+
+    # Our own writes drop the cached pages of the prefix
+    client.put("/router/s3/images/8/IMG999.jpg", content=b"new", headers={"Content-Type": "image/jpeg"})
+    assert client.get("/router/s3/images/8").json()["total_images"] == 6
+    client.post("/router/s3/images/delete-batch", json={"maintenance_id": 8, "image_names": ["IMG000.jpg"]})
+    assert client.get("/router/s3/images/8").json()["total_images"] == 5
+    assert len(calls) == 3
+
+
+def test_storage_backends_share_semantics(client, storage):
+    payload = bytes(range(256)) * 40
+    res = client.put("/router/s3/images/9/IMG001.jpg", content=payload, headers={"Content-Type": "image/jpeg"})
+    assert res.status_code == 201 and res.json()["size"] == len(payload)
+    client.put("/router/s3/images/9/IMG002.png", content=b"png", headers={"Content-Type": "image/png"})
+
+    res = client.get("/router/s3/images/9/IMG001.jpg")
+    assert res.status_code == 200 and res.content == payload
+    assert res.headers["content-type"] == "image/jpeg" and res.headers["ETag"]
+
+    for header, expected, content_range in (
+        ("bytes=10-19", payload[10:20], f"bytes 10-19/{len(payload)}"),
+        ("bytes=10000-", payload[10000:], f"bytes 10000-10239/{len(payload)}"),
+        ("bytes=-5", payload[-5:], f"bytes 10235-10239/{len(payload)}"),
+        ("bytes=100-999999", payload[100:], f"bytes 100-10239/{len(payload)}"),
+    ):
+        res = client.get("/router/s3/images/9/IMG001.jpg", headers={"Range": header})
+        assert res.status_code == 206, header
+        assert res.content == expected and res.headers["Content-Range"] == content_range
+    assert client.get("/router/s3/images/9/IMG001.jpg", headers={"Range": "bytes=20000-"}).status_code == 416
+    # Anything but a single byte range gets the whole object
+    res = client.get("/router/s3/images/9/IMG001.jpg", headers={"Range": "bytes=0-1,5-6"})
+    assert res.status_code == 200 and res.content == payload
+
+    # Pages stay full around the thumbs/ "subdirectory", which is not listed
+    import io
+    for name in ("IMG003.jpg", "zz.jpg"):
+        storage.backend.put(f"maintenance/9/thumbs/160/{name}", io.BytesIO(b"thumb"), "image/jpeg")
+    storage.backend.put("maintenance/9/zz.jpg", io.BytesIO(b"zz"), "image/jpeg")
+    pages, after = [], None
+    while True:
+        page = client.get("/router/s3/images/9", params={"limit": 1, **({"after": after} if after else {})}).json()
+        pages.append([i["object_key"] for i in page["images"]])
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert pages == [["maintenance/9/IMG001.jpg"], ["maintenance/9/IMG002.png"], ["maintenance/9/zz.jpg"]]
+    first = client.get("/router/s3/images/9", params={"limit": 2}).json()
+    assert first["images"][0]["size"] == len(payload)
+    second = client.get("/router/s3/images/9", params={"limit": 2, "after": first["next_cursor"]}).json()
+    assert [i["object_key"] for i in second["images"]] == ["maintenance/9/zz.jpg"] and second["next_cursor"] is None
+    client.post("/router/s3/images/delete-batch", json={"maintenance_id": 9, "image_names": ["zz.jpg", "IMG003.jpg"]})
+
+    res = client.post("/router/s3/images/9/copy", json={"target_maintenance_id": 10, "move": True})
+    assert res.json()["moved"] == 2
+    assert client.get("/router/s3/images/9/IMG001.jpg").status_code == 404
+    res = client.post("/router/s3/images/delete-batch", json={"maintenance_id": 10, "image_names": ["IMG001.jpg", "missing.jpg"]})
+    assert res.json()["deleted"] == 2
+    assert client.get("/router/s3/images/10/IMG001.jpg").status_code == 404
+    assert [i["object_key"] for i in client.get("/router/s3/images/10").json()["images"]] == ["maintenance/10/IMG002.png"]
+    if storage.backend.name == "local":
+        assert client.get("/router/s3/presigned-download/10/IMG002.png").status_code == 501
+        res = client.post("/router/s3/presigned-upload", json={"maintenance_id": 10, "image_name": "IMG003.jpg"})
+        assert res.status_code == 501
+
+
+def test_thumbnails_rendered_on_upload(client, storage, tmp_path, monkeypatch):
+    import io
+    import tempfile
+    from PIL import Image
+
+    # Sources are rendered from temporary files, all removed afterwards
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    def encoded(size, image_format):
+        out = io.BytesIO()
+        Image.new("RGB", size, (200, 40, 40)).save(out, image_format)
+        return out.getvalue()
+
+    res = client.put("/router/s3/images/11/IMG001.jpg", content=encoded((1200, 900), "JPEG"), headers={"Content-Type": "image/jpeg"})
+    assert res.status_code == 201
+    assert res.json()["thumbnails"] == {"160": "maintenance/11/thumbs/160/IMG001.jpg", "640": "maintenance/11/thumbs/640/IMG001.jpg"}
+
+    res = client.get("/router/s3/images/11/thumbs/160/IMG001.jpg")
+    assert res.status_code == 200 and res.headers["content-type"] == "image/jpeg"
+    assert res.headers["Cache-Control"] == "public, max-age=604800"
+    assert Image.open(io.BytesIO(res.content)).size == (160, 120)
+    again = client.get("/router/s3/images/11/thumbs/160/IMG001.jpg", headers={"If-None-Match": res.headers["ETag"]})
+    assert again.status_code == 304 and again.content == b""
+    assert client.get("/router/s3/images/11/thumbs/100/IMG001.jpg").status_code == 404
+
+    # Batch uploads get thumbnails too; files that are not images keep their original only
+    files = [("files", ("IMG002.png", encoded((300, 600), "PNG"), "image/png")), ("files", ("IMG003.jpg", b"not an image", "image/jpeg"))]
+    results = client.post("/router/s3/images/11/batch", files=files).json()["results"]
+    assert results[0]["thumbnails"] == {"160": "maintenance/11/thumbs/160/IMG002.png", "640": "maintenance/11/thumbs/640/IMG002.png"}
+    assert results[1]["thumbnails"] == {}
+    # Never enlarged
+    png = client.get("/router/s3/images/11/thumbs/640/IMG002.png")
+    assert Image.open(io.BytesIO(png.content)).size == (300, 600)
+    assert not any(name.startswith("thumbnail-source-") for name in os.listdir(tmp_path))
+
+    listed = client.get("/router/s3/images/11").json()
+    assert [i["object_key"] for i in listed["images"]] == [f"maintenance/11/IMG00{i}.{ext}" for i, ext in ((1, "jpg"), (2, "png"), (3, "jpg"))]
+
+    res = client.post("/router/s3/images/delete-batch", json={"maintenance_id": 11, "image_names": ["IMG001.jpg"]})
+    assert res.json()["deleted"] == 1 and len(res.json()["results"]) == 1
+    assert client.get("/router/s3/images/11/thumbs/160/IMG001.jpg").status_code == 404
+
+
+def test_worker_pools_sized_per_server_worker_and_shut_down(client, storage, monkeypatch):
+    from app.core.config import settings
+    from app.services.s3_service import s3_service
+    from app.services.thumbnail_service import thumbnail_service
+
+    monkeypatch.setattr(settings, "THUMBNAIL_WORKERS", None)
+    monkeypatch.setattr(settings, "SERVER_WORKERS", os.cpu_count())
+    assert thumbnail_service.pool_size() == 1
+    monkeypatch.setattr(settings, "THUMBNAIL_WORKERS", 3)
+    assert thumbnail_service.pool_size() == 3
+
+    with client:
+        files = [("files", ("IMG001.jpg", b"not an image", "image/jpeg"))]
+        assert client.post("/router/s3/images/12/batch", files=files).json()["uploaded"] == 1
+        assert s3_service._executor is not None and thumbnail_service._executor is not None
+    assert s3_service._executor is None and thumbnail_service._executor is None
+
+
+def test_list_without_limit_returns_default_page(client):
+    from app.core.config import settings
+
+    rows = [{"name": f"Tornillo {i}", "sku": f"SKU-P{i:04d}", "price": 0.5, "stock": 1, "category_id": None}
+            for i in range(settings.DEFAULT_PAGE_SIZE + 1)]
+    assert client.post("/router/items/bulk", json=rows).status_code == 200
+
+    res = client.get("/router/items/")
+    assert len(res.json()) == settings.DEFAULT_PAGE_SIZE
+    rest = client.get("/router/items/", params={"after": res.headers["X-Next-Cursor"]})
+    assert len(rest.json()) == 1 and "X-Next-Cursor" not in rest.headers